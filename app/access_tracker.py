@@ -0,0 +1,98 @@
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+from app.database import DatabaseManager, Session
+from app.logger_config import logger
+from app import maintenance
+from app.settings import Settings
+
+# Flush early when this many distinct items have unflushed reads
+MAX_PENDING_ACCESSES = 5000
+
+class AccessTracker:
+    """Counts battery reads in memory and writes them to the items in batches.
+
+    record() is what the read paths call; it only touches a dict. The
+    maintenance thread flushes the counts every access_flush_interval
+    seconds, along with the jobs registered with app.maintenance.on_flush.
+    Every eviction_interval seconds it also trims the battery back to
+    max_entries, least recently used items first, and runs the
+    maintenance.on_eviction jobs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._wakeup = threading.Event()
+        self._last_eviction = time.monotonic()
+
+    def record(self, imdb_id):
+        if not imdb_id:
+            return
+        now = datetime.utcnow()
+        with self._lock:
+            count, _ = self._pending.get(imdb_id, (0, None))
+            self._pending[imdb_id] = (count + 1, now)
+            pending = len(self._pending)
+        if pending >= MAX_PENDING_ACCESSES:
+            self._wakeup.set()
+
+    def pending(self):
+        return len(self._pending)
+
+    def flush(self):
+        with self._lock:
+            hits, self._pending = self._pending, {}
+        if not hits:
+            return 0
+        try:
+            DatabaseManager.record_item_access(hits)
+        except Exception as e:
+            logger.error(f"Could not record access for {len(hits)} items: {str(e)}")
+            # Put the counts back so they go out with the next flush
+            with self._lock:
+                for imdb_id, (count, last_accessed) in hits.items():
+                    newer_count, newer_accessed = self._pending.get(imdb_id, (0, last_accessed))
+                    self._pending[imdb_id] = (count + newer_count, newer_accessed)
+            return 0
+        logger.debug(f"Recorded access for {len(hits)} items")
+        return len(hits)
+
+    def evict(self):
+        max_entries = Settings().max_entries
+        if not max_entries or max_entries <= 0:
+            return 0
+        return DatabaseManager.evict_least_recently_used(int(max_entries))
+
+    def run_forever(self):
+        while True:
+            settings = Settings()
+            self._wakeup.wait(settings.access_flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                maintenance.run_flush_hooks()
+                if time.monotonic() - self._last_eviction >= settings.eviction_interval:
+                    self._last_eviction = time.monotonic()
+                    self.evict()
+                    maintenance.run_eviction_hooks()
+            except Exception as e:
+                logger.exception(f"Error during battery maintenance: {str(e)}")
+            finally:
+                Session.remove()
+
+access_tracker = AccessTracker()
+
+def tracks_access(func):
+    """Count a read of the item named by the decorated lookup's first argument."""
+    @wraps(func)
+    def wrapper(imdb_id, *args, **kwargs):
+        access_tracker.record(imdb_id)
+        return func(imdb_id, *args, **kwargs)
+    return wrapper
+
+def start_access_tracker():
+    thread = threading.Thread(target=access_tracker.run_forever, name='battery-maintenance', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,64 @@
+import queue
+import threading
+from app.database import Session
+from app.logger_config import logger
+from app.settings import Settings
+from app.trakt_scheduler import trakt_scheduler, BACKGROUND
+
+MAX_PENDING_REFRESHES = 1000
+
+class BackgroundRefresher:
+    """Deduplicated queue of refreshes run off the request path.
+
+    Used for stale-while-revalidate: callers get stored data immediately and
+    the refresh is queued here. A key that is already queued or running is
+    not queued again.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=MAX_PENDING_REFRESHES)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._workers = []
+
+    def enqueue(self, key, func, *args):
+        with self._lock:
+            if key in self._pending:
+                return False
+            try:
+                self._queue.put_nowait((key, func, args))
+            except queue.Full:
+                logger.warning(f"Background refresh queue is full, dropping refresh of {key}")
+                return False
+            self._pending.add(key)
+            self._start_workers()
+        logger.info(f"Queued background refresh of {key}")
+        return True
+
+    def _start_workers(self):
+        if self._workers:
+            return
+        for i in range(max(Settings().background_refresh_workers, 1)):
+            worker = threading.Thread(target=self._run, name=f'background-refresh-{i}', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _run(self):
+        while True:
+            key, func, args = self._queue.get()
+            try:
+                with trakt_scheduler.lane(BACKGROUND):
+                    func(*args)
+            except Exception as e:
+                logger.exception(f"Background refresh of {key} failed: {str(e)}")
+            finally:
+                Session.remove()
+                with self._lock:
+                    self._pending.discard(key)
+                self._queue.task_done()
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+background_refresher = BackgroundRefresher()
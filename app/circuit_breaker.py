@@ -0,0 +1,71 @@
+import threading
+import time
+from app.logger_config import logger
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEFAULT_FAILURE_THRESHOLD = 5  # consecutive failures
+DEFAULT_RESET_TIMEOUT = 60  # seconds before a trial request
+
+class CircuitBreaker:
+    """Stops calling an upstream that keeps failing.
+
+    After failure_threshold consecutive failures the breaker opens and
+    allow_request() refuses calls for reset_timeout seconds. Then a single
+    trial call is let through; its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, name, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_started = None
+
+    def allow_request(self):
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._trial_started = None
+            if self._state == HALF_OPEN:
+                # A trial that never reported back doesn't block the breaker forever
+                now = time.monotonic()
+                if self._trial_started is None or now - self._trial_started >= self.reset_timeout:
+                    self._trial_started = now
+                    return True
+            return False
+
+    def is_open(self):
+        with self._lock:
+            return self._state != CLOSED
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"{self.name} circuit breaker closed, upstream is healthy again")
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_started = None
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(f"{self.name} circuit breaker opened after {self._failures} failures")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def get_status(self):
+        with self._lock:
+            return {'state': self._state, 'consecutive_failures': self._failures}
+
+trakt_breaker = CircuitBreaker('Trakt')
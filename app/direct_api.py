@@ -14,6 +14,10 @@ class DirectAPI:
         release_dates, source = MetadataManager.get_release_dates(imdb_id)
         return release_dates, source
 
+    @staticmethod
+    def get_movie_metadata_with_release_dates(imdb_id: str):
+        return MetadataManager.get_movie_metadata_with_release_dates(imdb_id)
+
     @staticmethod
     def get_episode_metadata(imdb_id):
         metadata, source = MetadataManager.get_metadata_by_episode_imdb(imdb_id)
@@ -24,6 +28,10 @@ class DirectAPI:
         metadata, source = MetadataManager.get_show_metadata(imdb_id)
         return metadata, source
 
+    @staticmethod
+    def get_show_metadata_with_seasons(imdb_id: str):
+        return MetadataManager.get_show_metadata_with_seasons(imdb_id)
+
     @staticmethod
     def get_show_seasons(imdb_id: str) -> Tuple[Dict[str, Any], str]:
         seasons, source = MetadataManager.get_seasons(imdb_id)
@@ -32,4 +40,8 @@ class DirectAPI:
     @staticmethod
     def tmdb_to_imdb(tmdb_id: str) -> Optional[str]:
         imdb_id, source = MetadataManager.tmdb_to_imdb(tmdb_id)
-        return imdb_id, source
\ No newline at end of file
+        return imdb_id, source
+
+    @staticmethod
+    def search_titles(query: str, item_type: Optional[str] = None, year: Optional[int] = None, limit: int = 10):
+        return MetadataManager.search_titles(query, item_type, year, limit)
@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.logger_config import logger
+from app.settings import Settings
+from app.trakt_scheduler import trakt_scheduler
+
+SHOW = 'show'
+SHOW_SEASONS = 'show_seasons'
+MOVIE = 'movie'
+MOVIE_RELEASES = 'movie_releases'
+
+MAX_PARALLEL_FETCHES = 8
+
+_executor = ThreadPoolExecutor(max_workers=MAX_PARALLEL_FETCHES, thread_name_prefix='trakt-fetch')
+
+class FetchPlan:
+    """Collects the Trakt resources an operation needs and fetches each once.
+
+    Resources are (kind, imdb_id) pairs; asking for the same one twice is a
+    no-op. execute() runs the distinct fetches concurrently and returns
+    {(kind, imdb_id): result}, with None for anything that failed.
+
+    With stream_season_payloads on, SHOW_SEASONS goes to seasons_writer
+    when one is given, which stores the seasons as they download; its
+    return value is the result.
+    """
+
+    def __init__(self, trakt, seasons_writer=None):
+        self.trakt = trakt
+        self.seasons_writer = seasons_writer
+        self._resources = []
+
+    def need(self, kind, imdb_id):
+        if (kind, imdb_id) not in self._resources:
+            self._resources.append((kind, imdb_id))
+        return self
+
+    def __bool__(self):
+        return bool(self._resources)
+
+    def _fetcher(self, kind):
+        return {
+            SHOW: self.trakt._get_show_data,
+            SHOW_SEASONS: self._fetch_show_seasons,
+            MOVIE: self.trakt.get_movie_metadata,
+            MOVIE_RELEASES: self.trakt.get_release_dates,
+        }[kind]
+
+    def _fetch_show_seasons(self, imdb_id):
+        if self.seasons_writer is not None and Settings().stream_season_payloads:
+            return self.seasons_writer(imdb_id)
+        return self.trakt.get_show_seasons_and_episodes(imdb_id)[0]
+
+    def _fetch(self, lane, kind, imdb_id):
+        # Worker threads don't inherit the caller's scheduler lane
+        with trakt_scheduler.lane(lane):
+            try:
+                return self._fetcher(kind)(imdb_id)
+            except Exception as e:
+                logger.error(f"Error fetching {kind} for IMDB ID {imdb_id} from Trakt: {str(e)}")
+                return None
+
+    def execute(self):
+        lane = trakt_scheduler.current_lane()
+        if len(self._resources) == 1:
+            kind, imdb_id = self._resources[0]
+            return {(kind, imdb_id): self._fetch(lane, kind, imdb_id)}
+
+        logger.info(f"Fetching {len(self._resources)} Trakt resources concurrently: {self._resources}")
+        futures = {
+            resource: _executor.submit(self._fetch, lane, *resource)
+            for resource in self._resources
+        }
+        return {resource: future.result() for resource, future in futures.items()}
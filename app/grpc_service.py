@@ -4,15 +4,17 @@ import metadata_service_pb2
 import metadata_service_pb2_grpc
 from app.direct_api import DirectAPI
 from app.logger_config import logger
+from app.settings import Settings
 import json
 import datetime
 
 class MetadataServicer(metadata_service_pb2_grpc.MetadataServiceServicer):
     def GetMovieMetadata(self, request, context):
-        metadata, source = DirectAPI.get_movie_metadata(request.imdb_id)
-        
-        # Get release dates
-        release_dates, release_dates_source = DirectAPI.get_movie_release_dates(request.imdb_id)
+        metadata, source, release_dates, release_dates_source = DirectAPI.get_movie_metadata_with_release_dates(request.imdb_id)
+        if metadata is None:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(f"Movie metadata not found for IMDB ID: {request.imdb_id}")
+            return metadata_service_pb2.MetadataResponse()
         
         # Add release dates to metadata
         metadata['release_dates'] = release_dates
@@ -69,15 +71,12 @@ class MetadataServicer(metadata_service_pb2_grpc.MetadataServiceServicer):
             context.abort(grpc.StatusCode.INTERNAL, f"Internal error: {str(e)}")
 
     def GetShowMetadata(self, request, context):
-        metadata, source = DirectAPI.get_show_metadata(request.imdb_id)
+        metadata, source, seasons_data, seasons_source = DirectAPI.get_show_metadata_with_seasons(request.imdb_id)
         if metadata is None:
             context.set_code(grpc.StatusCode.NOT_FOUND)
             context.set_details(f"Show metadata not found for IMDb ID: {request.imdb_id}")
             return metadata_service_pb2.MetadataResponse()
         
-        # Get seasons data
-        seasons_data, seasons_source = DirectAPI.get_show_seasons(request.imdb_id)
-        
         # Add seasons data to metadata
         metadata['seasons'] = seasons_data
         
@@ -141,6 +140,28 @@ class MetadataServicer(metadata_service_pb2_grpc.MetadataServiceServicer):
         imdb_id, source = DirectAPI.tmdb_to_imdb(request.tmdb_id)
         return metadata_service_pb2.IMDbResponse(imdb_id=imdb_id, source=source)
 
+    def SearchTitles(self, request, context):
+        try:
+            results = DirectAPI.search_titles(
+                request.query,
+                item_type=request.type or None,
+                year=request.year or None,
+                limit=request.limit or 10
+            )
+            return metadata_service_pb2.SearchResponse(results=[
+                metadata_service_pb2.SearchResult(
+                    imdb_id=result['imdb_id'],
+                    title=result['title'],
+                    year=result['year'] or 0,
+                    type=result['type'] or '',
+                    score=result['score']
+                )
+                for result in results
+            ])
+        except Exception as e:
+            logger.exception("Error in SearchTitles")
+            context.abort(grpc.StatusCode.INTERNAL, f"Internal error: {str(e)}")
+
     @staticmethod
     def _json_serial(obj):
         """JSON serializer for objects not serializable by default json code"""
@@ -150,7 +171,7 @@ class MetadataServicer(metadata_service_pb2_grpc.MetadataServiceServicer):
 
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=Settings().grpc_max_workers))
     metadata_service_pb2_grpc.add_MetadataServiceServicer_to_server(MetadataServicer(), server)
     server.add_insecure_port('[::]:50051')
     server.start()
@@ -0,0 +1,56 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.settings import Settings
+from app.logger_config import logger
+
+# Statuses worth retrying on our side. 429 is deliberately left out so the
+# caller can see it and back off according to Trakt's rate limit headers.
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+def _build_session():
+    settings = Settings()
+    retries = Retry(
+        total=settings.http_max_retries,
+        connect=settings.http_max_retries,
+        read=settings.http_max_retries,
+        status=settings.http_max_retries,
+        backoff_factor=settings.http_backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        # urllib3 would otherwise silently retry any 429 carrying Retry-After
+        respect_retry_after_header=False,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=settings.http_pool_size,
+        max_retries=retries
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    logger.info(f"HTTP session created: pool_maxsize={settings.http_pool_size}, "
+                f"max_retries={settings.http_max_retries}, backoff_factor={settings.http_backoff_factor}")
+    return session
+
+def get_session():
+    """Return the process-wide pooled session used for all Trakt traffic."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+def reset_session():
+    """Drop the shared session so the next call picks up new pool settings."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
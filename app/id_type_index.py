@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from app import maintenance
+from app.database import IndependentSession, Item, ItemTypeIndex, upsert_rows
+from app.logger_config import logger
+
+# Types kept in memory, least recently used dropped first; the table stays
+# the source of truth for the rest.
+MAX_KNOWN_TYPES = 100000
+# IDs neither the index nor the items know, so repeat lookups of an unknown
+# ID don't query both tables every time; the set is dropped when it grows
+# past this.
+MAX_ABSENT_KEYS = 100000
+
+class IdTypeIndex:
+    """Persisted imdb_id -> type ('movie', 'show', 'episode') lookup.
+
+    Filled from every Trakt payload we see and from Item.type, so lookups
+    can go straight to the right Trakt endpoint. Recently used entries
+    are kept in memory; the table backs the rest and survives restarts.
+    It is called from inside other sessions, so it reads with its own and
+    leaves writes to flush(), which the maintenance thread runs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._types = OrderedDict()
+        self._absent = set()
+        self._unsaved = {}
+
+    def _remember(self, imdb_id, item_type):
+        # Caller holds _lock
+        self._types[imdb_id] = item_type
+        self._types.move_to_end(imdb_id)
+        while len(self._types) > MAX_KNOWN_TYPES:
+            self._types.popitem(last=False)
+
+    def lookup(self, imdb_id):
+        if not imdb_id:
+            return None
+        with self._lock:
+            if imdb_id in self._types:
+                self._types.move_to_end(imdb_id)
+                return self._types[imdb_id]
+            if imdb_id in self._unsaved:
+                return self._unsaved[imdb_id]
+            if imdb_id in self._absent:
+                return None
+
+        with IndependentSession() as session:
+            entry = session.get(ItemTypeIndex, imdb_id)
+            item_type = entry.type if entry else None
+            if item_type is None:
+                item_type = session.query(Item.type).filter_by(imdb_id=imdb_id).scalar()
+
+        with self._lock:
+            if item_type:
+                self._remember(imdb_id, item_type)
+            else:
+                if len(self._absent) >= MAX_ABSENT_KEYS:
+                    self._absent.clear()
+                self._absent.add(imdb_id)
+        return item_type
+
+    def record(self, imdb_id, item_type):
+        self.record_many({imdb_id: item_type})
+
+    def record_many(self, types):
+        with self._lock:
+            changed = {imdb_id: item_type for imdb_id, item_type in types.items()
+                       if imdb_id and item_type and self._types.get(imdb_id) != item_type}
+            for imdb_id, item_type in changed.items():
+                self._absent.discard(imdb_id)
+                self._remember(imdb_id, item_type)
+            self._unsaved.update(changed)
+
+    def flush(self):
+        """Write entries recorded since the last flush to the table."""
+        with self._lock:
+            unsaved, self._unsaved = self._unsaved, {}
+        if not unsaved:
+            return 0
+
+        now = datetime.utcnow()
+        rows = [{'imdb_id': imdb_id, 'type': item_type, 'updated_at': now} for imdb_id, item_type in unsaved.items()]
+        try:
+            with IndependentSession() as session:
+                upsert_rows(session, ItemTypeIndex.__table__, rows, ['imdb_id'], ['type', 'updated_at'])
+                session.commit()
+        except Exception as e:
+            # The index is only a hint, keep the entries for the next flush
+            logger.warning(f"Could not persist item type index entries: {str(e)}")
+            with self._lock:
+                for imdb_id, item_type in unsaved.items():
+                    self._unsaved.setdefault(imdb_id, item_type)
+            return 0
+        return len(rows)
+
+id_type_index = IdTypeIndex()
+maintenance.on_flush(id_type_index.flush)
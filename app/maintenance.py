@@ -0,0 +1,30 @@
+from app.logger_config import logger
+
+# Jobs the battery maintenance thread runs: flush hooks every
+# access_flush_interval seconds, eviction hooks every eviction_interval.
+_flush_hooks = []
+_eviction_hooks = []
+
+def on_flush(hook):
+    """Run hook (no arguments) on every maintenance pass, e.g. to persist buffered writes."""
+    _flush_hooks.append(hook)
+    return hook
+
+def on_eviction(hook):
+    """Run hook (no arguments) whenever the battery is trimmed."""
+    _eviction_hooks.append(hook)
+    return hook
+
+def _run(hooks):
+    for hook in list(hooks):
+        try:
+            hook()
+        except Exception as e:
+            # One failing job shouldn't hold up the others
+            logger.exception(f"Error in maintenance job {getattr(hook, '__qualname__', hook)}: {str(e)}")
+
+def run_flush_hooks():
+    _run(_flush_hooks)
+
+def run_eviction_hooks():
+    _run(_eviction_hooks)
@@ -1,6 +1,6 @@
-from app.database import DatabaseManager, Session, Item, Metadata, Season, Episode, TMDBToIMDBMapping
+from app.database import DatabaseManager, Session, IndependentSession, Item, Metadata, ItemDocument, Season, Episode, TMDBToIMDBMapping, upsert_rows
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import func, cast, String, or_
+from sqlalchemy import func, cast, String, or_, tuple_
 from sqlalchemy.orm import joinedload
 from app.trakt_metadata import TraktMetadata
 from PIL import Image
@@ -10,12 +10,50 @@ from io import BytesIO
 from app.settings import Settings
 import json
 from sqlalchemy.orm import selectinload
-from sqlalchemy.dialects.postgresql import JSON, insert
 from sqlalchemy.exc import IntegrityError
 import iso8601
 from collections import defaultdict
 from app.settings import Settings
 from datetime import datetime, timezone
+from app.single_flight import single_flight
+from app.trakt_sync import trakt_sync
+from app.fetch_plan import FetchPlan, SHOW, SHOW_SEASONS, MOVIE, MOVIE_RELEASES
+from app.background_refresh import background_refresher
+from app.circuit_breaker import trakt_breaker
+from app.stats_snapshot import StatsSnapshot
+from app.access_tracker import access_tracker, tracks_access
+from app.search_index import title_search
+from app.result_cache import result_cache, cached_result
+from app.ttl_policy import TTLPolicy
+
+EPISODE_BATCH_SIZE = 200
+# Episode columns compared to decide whether a stored episode needs rewriting
+EPISODE_FIELDS = ('title', 'overview', 'runtime', 'first_aired', 'imdb_id')
+
+# Source tag for battery data served past its staleness threshold
+STALE_SOURCE = "battery (stale)"
+
+def _cacheable(result):
+    # Only (data, source, ...) results read fresh from the battery; anything
+    # stale or just fetched from Trakt is looked up again next time.
+    return (isinstance(result, tuple) and all(value is not None for value in result[::2])
+            and all(source == 'battery' for source in result[1::2]))
+
+def _shared_ttl(imdb_id):
+    # Keep an item in the shared cache no longer than it stays fresh. While
+    # the Trakt updates feed decides staleness, changes arrive as
+    # invalidations instead and the maximum applies.
+    settings = Settings()
+    # Runs inside the lookup's own session; don't end it from here
+    with IndependentSession() as session:
+        item = session.query(Item.updated_at, Item.ttl_seconds).filter_by(imdb_id=imdb_id).first()
+    if item is None or item.updated_at is None:
+        return settings.shared_cache_max_ttl
+    updated_at = item.updated_at.astimezone(timezone.utc).replace(tzinfo=None) if item.updated_at.tzinfo else item.updated_at
+    if trakt_sync.is_authoritative(updated_at):
+        return settings.shared_cache_max_ttl
+    fresh_for = (updated_at + TTLPolicy.freshness_window(item) - datetime.utcnow()).total_seconds()
+    return min(settings.shared_cache_max_ttl, fresh_for)
 
 class MetadataManager:
 
@@ -31,9 +69,20 @@ class MetadataManager:
         DatabaseManager.add_or_update_metadata(imdb_id, metadata_dict, provider)
 
     @staticmethod
-    def is_metadata_stale(last_updated):
-        settings = Settings()
-        staleness_threshold = settings.staleness_threshold_timedelta
+    def is_metadata_stale(last_updated, item=None):
+        # While the Trakt updates feed is being followed, only items Trakt
+        # reported as changed since we stored them are stale.
+        naive_last_updated = last_updated.astimezone(timezone.utc).replace(tzinfo=None) if last_updated.tzinfo else last_updated
+        if item is not None and trakt_sync.is_authoritative(naive_last_updated):
+            is_stale = item.trakt_updated_at is not None and item.trakt_updated_at > naive_last_updated
+            if is_stale:
+                logger.info(f"Metadata is stale. Trakt reported a change at {item.trakt_updated_at}.")
+            else:
+                logger.info("Metadata is fresh. No change reported by Trakt since it was stored.")
+            return is_stale
+
+        # Otherwise each item has its own freshness window, see TTLPolicy
+        staleness_threshold = TTLPolicy.freshness_window(item)
         
         # Ensure last_updated is timezone-aware
         if last_updated.tzinfo is None:
@@ -52,6 +101,80 @@ class MetadataManager:
         
         return is_stale
 
+    @staticmethod
+    def _revalidate_in_background(kind, imdb_id):
+        """Queue a refresh of stale data if the caller should serve its stored copy meanwhile.
+
+        That's the case in stale-while-revalidate mode, and in any mode while
+        the Trakt circuit breaker is open.
+        """
+        if not Settings().stale_while_revalidate and not trakt_breaker.is_open():
+            return False
+        background_refresher.enqueue((kind, imdb_id), MetadataManager.refresh_in_background, kind, imdb_id)
+        return True
+
+    @staticmethod
+    def refresh_in_background(kind, imdb_id):
+        logger.info(f"Background refresh of {kind} data for IMDB ID: {imdb_id}")
+        if kind == 'movie':
+            return MetadataManager._refresh_movie(imdb_id)
+        if kind == 'show':
+            return MetadataManager._refresh_show(imdb_id)
+        if kind == 'seasons':
+            return MetadataManager.refresh_seasons(imdb_id, None, collect=False)[0] is not None
+        if kind == 'release_dates':
+            return MetadataManager.refresh_release_dates(imdb_id, None)[0] is not None
+        raise ValueError(f"Unknown refresh kind: {kind}")
+
+    @staticmethod
+    def _refresh_movie(imdb_id):
+        # Storing movie metadata replaces the release dates row, so both are refreshed
+        results = FetchPlan(TraktMetadata()).need(MOVIE, imdb_id).need(MOVIE_RELEASES, imdb_id).execute()
+        movie_data = results[(MOVIE, imdb_id)]
+        if not movie_data:
+            logger.warning(f"Background refresh got no movie metadata for IMDB ID: {imdb_id}")
+            return False
+        with Session() as session:
+            item = session.query(Item).filter_by(imdb_id=imdb_id, type='movie').first()
+            if item:
+                MetadataManager.update_movie_metadata(item, movie_data, session)
+            else:
+                MetadataManager._store_new_movie(session, imdb_id, movie_data)
+        if results[(MOVIE_RELEASES, imdb_id)]:
+            MetadataManager.add_or_update_metadata(imdb_id, {'release_dates': results[(MOVIE_RELEASES, imdb_id)]}, 'Trakt')
+        return True
+
+    @staticmethod
+    def _refresh_show(imdb_id):
+        with Session() as session:
+            streamed = MetadataManager._streams_seasons(session.query(Item.id).filter_by(imdb_id=imdb_id, type='show').scalar())
+        results = MetadataManager._show_plan().need(SHOW, imdb_id).need(SHOW_SEASONS, imdb_id).execute()
+        show_data = results[(SHOW, imdb_id)]
+        if not show_data:
+            logger.warning(f"Background refresh got no show metadata for IMDB ID: {imdb_id}")
+            return False
+        trakt_seasons = results[(SHOW_SEASONS, imdb_id)]
+        show_data['seasons'] = trakt_seasons
+        with Session() as session:
+            item = session.query(Item).filter_by(imdb_id=imdb_id, type='show').first()
+            if item:
+                MetadataManager.update_show_metadata(item, show_data, session)
+            else:
+                MetadataManager._store_new_show(session, imdb_id, show_data)
+        if trakt_seasons and not streamed:
+            MetadataManager.add_or_update_seasons_and_episodes(imdb_id, trakt_seasons)
+        return True
+
+    @staticmethod
+    def _show_plan():
+        return FetchPlan(TraktMetadata(), seasons_writer=MetadataManager.stream_seasons_and_episodes)
+
+    @staticmethod
+    def _streams_seasons(item_id):
+        # Seasons only stream into a show already in the battery; a new
+        # show's are fetched whole and stored once the show is.
+        return item_id is not None and Settings().stream_season_payloads
+
     @staticmethod
     def debug_find_item(imdb_id):
         with Session() as session:
@@ -77,54 +200,78 @@ class MetadataManager:
     def get_all_items():
         return DatabaseManager.get_all_items()
 
+    @staticmethod
+    def list_items(after_id=None, limit=50, item_type=None, stale=None, provider=None):
+        return DatabaseManager.list_items(after_id, limit, item_type, stale, provider)
+
+    @staticmethod
+    def search_titles(query, item_type=None, year=None, limit=10):
+        return title_search.search(query, item_type, year, limit)
+
     @staticmethod
     def delete_item(imdb_id):
-        return DatabaseManager.delete_item(imdb_id)
+        deleted = DatabaseManager.delete_item(imdb_id)
+        if deleted:
+            stats_snapshot.invalidate()
+        return deleted
 
     @staticmethod
-    def add_or_update_poster(item_id, image_data):
-        DatabaseManager.add_or_update_poster(item_id, image_data)
+    def add_or_update_poster(imdb_id, image_data):
+        return DatabaseManager.add_or_update_poster(imdb_id, image_data)
 
     @staticmethod
     def get_poster(imdb_id):
-        poster_data = DatabaseManager.get_poster(imdb_id)
-        if poster_data:
-            return poster_data
+        """Poster store hash of imdb_id's poster, fetching it if we have none."""
+        content_hash = DatabaseManager.get_poster_hash(imdb_id)
+        if content_hash:
+            return content_hash
 
         # If poster not in database, fetch from Trakt
         trakt = TraktMetadata()
         poster_url = trakt.get_poster(imdb_id)
-        if poster_url:
+        if poster_url and poster_url.startswith('http'):
             response = requests.get(poster_url)
             if response.status_code == 200:
                 image = Image.open(BytesIO(response.content))
                 image_data = BytesIO()
-                image.save(image_data, format='JPEG')
-                image_data = image_data.getvalue()
-
-                # Save poster to database
-                MetadataManager.add_or_update_poster(imdb_id, image_data)
-
-                return image_data
+                image.convert('RGB').save(image_data, format='JPEG')
+                return MetadataManager.add_or_update_poster(imdb_id, image_data.getvalue())
 
         return None
 
     @staticmethod
     def get_stats():
+        """Battery totals for the dashboard, from a snapshot at most stats_snapshot_ttl old."""
+        return stats_snapshot.get()
+
+    @staticmethod
+    def _compute_stats():
         with Session() as session:
             total_items = session.query(func.count(Item.id)).scalar()
             total_metadata = session.query(func.count(Metadata.id)).scalar()
-            providers = session.query(Metadata.provider, func.count(Metadata.id)).group_by(Metadata.provider).all()
+            providers = dict(session.query(Metadata.provider, func.count(Metadata.id)).group_by(Metadata.provider).all())
             last_update = session.query(func.max(Metadata.last_updated)).scalar()
 
+            if DatabaseManager.uses_metadata_documents():
+                # Items not migrated yet are still in rows, so both are counted
+                for provider, documents in session.query(ItemDocument.provider, func.count(ItemDocument.id)).group_by(ItemDocument.provider):
+                    providers[provider] = providers.get(provider, 0) + documents
+                    total_metadata += documents
+                documents_updated = session.query(func.max(ItemDocument.updated_at)).scalar()
+                if documents_updated and (last_update is None or documents_updated > last_update):
+                    last_update = documents_updated
+
             return {
                 'total_items': total_items,
                 'total_metadata': total_metadata,
-                'providers': dict(providers),
+                'providers': providers,
                 'last_update': last_update
             }
             
     @staticmethod
+    @tracks_access
+    @cached_result('seasons', _cacheable, _shared_ttl)
+    @single_flight('seasons')
     def get_seasons(imdb_id):
         logger.info(f"Requesting seasons data for IMDB ID: {imdb_id}")
         with Session() as session:
@@ -133,9 +280,15 @@ class MetadataManager:
                 seasons = session.query(Season).filter_by(item_id=item.id).options(selectinload(Season.episodes)).all()
                 if seasons:
                     # Check if the seasons data is stale
-                    if MetadataManager.is_metadata_stale(item.updated_at):
+                    if MetadataManager.is_metadata_stale(item.updated_at, item):
+                        if MetadataManager._revalidate_in_background('seasons', imdb_id):
+                            logger.info(f"Serving stale seasons data for IMDB ID: {imdb_id} while it refreshes in the background.")
+                            return MetadataManager.format_seasons_data(seasons), STALE_SOURCE
                         logger.info(f"Seasons data for IMDB ID: {imdb_id} is stale. Refreshing from Trakt.")
-                        return MetadataManager.refresh_seasons(imdb_id, session)
+                        seasons_data, source = MetadataManager.refresh_seasons(imdb_id, session)
+                        if seasons_data:
+                            return seasons_data, source
+                        return MetadataManager.format_seasons_data(seasons), STALE_SOURCE
                     else:
                         logger.info(f"Using fresh seasons data from battery for IMDB ID: {imdb_id}")
                         seasons_data = MetadataManager.format_seasons_data(seasons)
@@ -145,8 +298,20 @@ class MetadataManager:
         return MetadataManager.refresh_seasons(imdb_id, session)
 
     @staticmethod
-    def refresh_seasons(imdb_id, session):
+    def refresh_seasons(imdb_id, session, collect=True):
+        """Fetch and store a show's seasons, returning (seasons_data, source).
+
+        With collect=False and stream_season_payloads on, the seasons are not
+        kept in memory and the number of stored episodes takes their place.
+        """
         logger.info(f"Fetching seasons and episodes data from Trakt for IMDB ID: {imdb_id}")
+        if Settings().stream_season_payloads:
+            seasons_data = MetadataManager.stream_seasons_and_episodes(imdb_id, collect)
+            if seasons_data or (not collect and seasons_data is not None):
+                return seasons_data, 'trakt'
+            logger.warning(f"No seasons data found for IMDB ID: {imdb_id}")
+            return None, None
+
         trakt = TraktMetadata()
         seasons_data, source = trakt.get_show_seasons_and_episodes(imdb_id)
         if seasons_data:
@@ -156,6 +321,135 @@ class MetadataManager:
         logger.warning(f"No seasons data found for IMDB ID: {imdb_id}")
         return None, None
 
+    @staticmethod
+    def stream_seasons_and_episodes(imdb_id, collect=True):
+        """Stream a show's seasons from Trakt straight into the battery.
+
+        Episodes are parsed into batches and each batch is written in its
+        own short transaction, so the raw Trakt document is never held in
+        memory and no transaction stays open while the download runs. A
+        show not in the battery yet has nothing to stream into; its
+        seasons are fetched whole and returned without being stored. With
+        collect=False nothing is kept and only the number of stored
+        episodes is returned.
+        """
+        trakt = TraktMetadata()
+        # Called from inside the caller's session; use our own so each batch commits on its own
+        with IndependentSession() as session:
+            item_id = session.query(Item.id).filter_by(imdb_id=imdb_id).scalar()
+            season_ids = {
+                season_number: season_id
+                for season_id, season_number in session.query(Season.id, Season.season_number).filter_by(item_id=item_id)
+            } if item_id else {}
+        if not item_id:
+            logger.info(f"Show {imdb_id} is not in the battery yet, fetching its seasons without streaming")
+            seasons_data, _ = trakt.get_show_seasons_and_episodes(imdb_id)
+            return seasons_data if collect else None
+
+        seasons_data = {}
+        stored = 0
+        episodes, season_counts = [], []
+        try:
+            for event in trakt.iter_show_seasons_and_episodes(imdb_id):
+                if event[0] == 'season':
+                    _, season_number, episode_count = event
+                    season_counts.append((season_number, episode_count))
+                    if collect:
+                        seasons_data.setdefault(season_number, {'episodes': {}})['episode_count'] = episode_count
+                    continue
+
+                _, season_number, episode_number, episode_info = event
+                episodes.append((season_number, episode_number, episode_info))
+                if collect:
+                    season_entry = seasons_data.setdefault(season_number, {'episode_count': 0, 'episodes': {}})
+                    season_entry['episodes'][episode_number] = episode_info
+                if len(episodes) >= EPISODE_BATCH_SIZE:
+                    stored += MetadataManager._write_streamed_batch(item_id, season_ids, episodes, season_counts)
+                    episodes, season_counts = [], []
+
+            if episodes or season_counts:
+                stored += MetadataManager._write_streamed_batch(item_id, season_ids, episodes, season_counts)
+        except Exception as e:
+            logger.error(f"Error streaming seasons for IMDB ID {imdb_id}: {str(e)}")
+            return None
+        finally:
+            result_cache.invalidate(imdb_id)
+
+        if not season_ids:
+            return None
+        logger.info(f"Streamed {stored} episodes into the battery for IMDB ID: {imdb_id}")
+        return seasons_data if collect else stored
+
+    @staticmethod
+    def _write_streamed_batch(item_id, season_ids, episodes, season_counts):
+        """Store one parsed batch of (season, episode, info) and finished season counts, then commit."""
+        with IndependentSession() as session:
+            batch = [
+                (MetadataManager._ensure_season(session, item_id, season_ids, season_number), episode_number, episode_info)
+                for season_number, episode_number, episode_info in episodes
+            ]
+            for season_number, episode_count in season_counts:
+                season_id = MetadataManager._ensure_season(session, item_id, season_ids, season_number)
+                session.query(Season).filter_by(id=season_id).update({'episode_count': episode_count})
+            if batch:
+                MetadataManager._write_episode_batch(session, batch)
+            session.commit()
+        return len(batch)
+
+    @staticmethod
+    def _ensure_season(session, item_id, season_ids, season_number):
+        if season_number not in season_ids:
+            season = Season(item_id=item_id, season_number=season_number, episode_count=0)
+            session.add(season)
+            session.flush()
+            season_ids[season_number] = season.id
+        return season_ids[season_number]
+
+    @staticmethod
+    def _write_episode_batch(session, batch):
+        rows = [MetadataManager._episode_row(*episode) for episode in batch]
+        keys = [(row['season_id'], row['episode_number']) for row in rows]
+        existing = MetadataManager._stored_episodes(
+            session, tuple_(Episode.season_id, Episode.episode_number).in_(keys)
+        )
+        MetadataManager._upsert_changed_episodes(session, rows, existing)
+
+    @staticmethod
+    def _episode_row(season_id, episode_number, episode_info):
+        first_aired = episode_info['first_aired']
+        if first_aired:
+            # Stored as naive UTC, which is also how it reads back for the diff
+            first_aired = iso8601.parse_date(first_aired).astimezone(timezone.utc).replace(tzinfo=None)
+        return {
+            'season_id': season_id,
+            'episode_number': int(episode_number),
+            'title': episode_info['title'],
+            'overview': episode_info['overview'],
+            'runtime': episode_info['runtime'],
+            'first_aired': first_aired,
+            'imdb_id': episode_info['imdb_id']
+        }
+
+    @staticmethod
+    def _stored_episodes(session, criterion):
+        columns = [getattr(Episode, field) for field in EPISODE_FIELDS]
+        return {
+            (row[0], row[1]): tuple(row[2:])
+            for row in session.query(Episode.season_id, Episode.episode_number, *columns).filter(criterion)
+        }
+
+    @staticmethod
+    def _upsert_changed_episodes(session, rows, existing):
+        """Write the rows that are new or differ from existing, in multi-row upserts."""
+        changed = [
+            row for row in rows
+            if existing.get((row['season_id'], row['episode_number'])) != tuple(row[field] for field in EPISODE_FIELDS)
+        ]
+        for start in range(0, len(changed), EPISODE_BATCH_SIZE):
+            upsert_rows(session, Episode.__table__, changed[start:start + EPISODE_BATCH_SIZE],
+                        ['season_id', 'episode_number'], list(EPISODE_FIELDS))
+        return len(changed)
+
     @staticmethod
     def format_seasons_data(seasons):
         seasons_data = {}
@@ -176,42 +470,47 @@ class MetadataManager:
 
     @staticmethod
     def add_or_update_seasons_and_episodes(imdb_id, seasons_data):
+        """Store a show's seasons and episodes, writing only what changed.
+
+        The item's stored season and episode keys are loaded in one query
+        each and diffed against seasons_data; new and changed rows go out as
+        multi-row upserts.
+        """
         with Session() as session:
             item = session.query(Item).filter_by(imdb_id=imdb_id).first()
             if not item:
                 logger.error(f"Item with IMDB ID {imdb_id} not found when adding seasons and episodes.")
                 return False
 
-            for season_number, season_info in seasons_data.items():
-                season = session.query(Season).filter_by(item_id=item.id, season_number=season_number).first()
-                if not season:
-                    season = Season(item_id=item.id, season_number=season_number, episode_count=season_info['episode_count'])
-                    session.add(season)
-                else:
-                    season.episode_count = season_info['episode_count']
-
-                for episode_number, episode_info in season_info['episodes'].items():
-                    episode = session.query(Episode).filter_by(season_id=season.id, episode_number=episode_number).first()
-                    if not episode:
-                        episode = Episode(
-                            season_id=season.id,
-                            episode_number=episode_number,
-                            title=episode_info['title'],
-                            overview=episode_info['overview'],
-                            runtime=episode_info['runtime'],
-                            first_aired=iso8601.parse_date(episode_info['first_aired']) if episode_info['first_aired'] else None,
-                            imdb_id=episode_info['imdb_id']
-                        )
-                        session.add(episode)
-                    else:
-                        episode.title = episode_info['title']
-                        episode.overview = episode_info['overview']
-                        episode.runtime = episode_info['runtime']
-                        episode.first_aired = iso8601.parse_date(episode_info['first_aired']) if episode_info['first_aired'] else None
-                        episode.imdb_id = episode_info['imdb_id']
+            stored_seasons = {
+                season_number: (season_id, episode_count)
+                for season_id, season_number, episode_count
+                in session.query(Season.id, Season.season_number, Season.episode_count).filter_by(item_id=item.id)
+            }
+            season_rows = [
+                {'item_id': item.id, 'season_number': int(season_number), 'episode_count': season_info['episode_count']}
+                for season_number, season_info in seasons_data.items()
+                if int(season_number) not in stored_seasons
+                or stored_seasons[int(season_number)][1] != season_info['episode_count']
+            ]
+            upsert_rows(session, Season.__table__, season_rows, ['item_id', 'season_number'], ['episode_count'])
+
+            season_ids = {season_number: season_id for season_number, (season_id, _) in stored_seasons.items()}
+            if any(row['season_number'] not in season_ids for row in season_rows):
+                season_ids = dict(session.query(Season.season_number, Season.id).filter_by(item_id=item.id))
+
+            episode_rows = [
+                MetadataManager._episode_row(season_ids[int(season_number)], episode_number, episode_info)
+                for season_number, season_info in seasons_data.items()
+                for episode_number, episode_info in season_info['episodes'].items()
+            ]
+            existing = MetadataManager._stored_episodes(session, Episode.season_id.in_(list(season_ids.values())))
+            written = MetadataManager._upsert_changed_episodes(session, episode_rows, existing)
 
             session.commit()
-            logger.info(f"Seasons and episodes updated for IMDB ID: {imdb_id}")
+            result_cache.invalidate(imdb_id)
+            logger.info(f"Seasons and episodes updated for IMDB ID: {imdb_id}: "
+                        f"{len(season_rows)} seasons and {written} of {len(episode_rows)} episodes written")
             return True
 
     @staticmethod
@@ -297,14 +596,10 @@ class MetadataManager:
                 ]
 
                 # Perform bulk upsert
-                stmt = insert(Season).values(upsert_data)
-                stmt = stmt.on_conflict_do_update(
-                    constraint='uix_item_season',  # Use the constraint name we defined earlier
-                    set_=dict(episode_count=stmt.excluded.episode_count)
-                )
-                session.execute(stmt)
+                upsert_rows(session, Season.__table__, upsert_data, ['item_id', 'season_number'], ['episode_count'])
 
                 session.commit()
+                result_cache.invalidate(imdb_id)
                 logger.info(f"Seasons data updated for IMDB ID: {imdb_id}, Provider: {provider}")
                 return True
             except IntegrityError as e:
@@ -323,16 +618,16 @@ class MetadataManager:
             if not item:
                 return None
 
-            metadata = next((m for m in item.item_metadata if m.key == key), None)
-            if not metadata:
+            metadata = MetadataManager._battery_show_metadata(session, item)
+            if key not in metadata:
                 new_metadata = MetadataManager.refresh_metadata(imdb_id)
                 return {key: new_metadata.get(key)}
 
-            if MetadataManager.is_metadata_stale(item):
+            if MetadataManager.is_metadata_stale(item.updated_at, item):
                 new_metadata = MetadataManager.refresh_metadata(imdb_id)
-                return {key: new_metadata.get(key, json.loads(metadata.value))}
+                return {key: new_metadata.get(key, metadata[key])}
 
-            return {key: json.loads(metadata.value)}
+            return {key: metadata[key]}
 
     @staticmethod
     def refresh_metadata(imdb_id):
@@ -346,6 +641,7 @@ class MetadataManager:
                         MetadataManager.add_or_update_metadata(item.id, key, value, 'Trakt')
                     item.updated_at = datetime.utcnow()
                     session.commit()
+                    result_cache.invalidate(imdb_id)
         return new_metadata
 
     # TODO: Implement method to refresh metadata from enabled providers
@@ -449,20 +745,10 @@ class MetadataManager:
                     return False
 
                 # Perform bulk upsert
-                stmt = insert(Episode).values(upsert_data)
-                stmt = stmt.on_conflict_do_update(
-                    index_elements=['season_id', 'episode_number'],
-                    set_=dict(
-                        title=stmt.excluded.title,
-                        overview=stmt.excluded.overview,
-                        runtime=stmt.excluded.runtime,
-                        first_aired=stmt.excluded.first_aired,
-                        imdb_id=stmt.excluded.imdb_id
-                    )
-                )
-                session.execute(stmt)
+                upsert_rows(session, Episode.__table__, upsert_data, ['season_id', 'episode_number'], list(EPISODE_FIELDS))
 
                 session.commit()
+                result_cache.invalidate(imdb_id)
                 logger.info(f"Episodes updated for IMDB ID: {imdb_id}, Provider: {provider}")
                 return True
 
@@ -472,23 +758,28 @@ class MetadataManager:
                 return False
 
     @staticmethod
+    @tracks_access
+    @cached_result('release_dates', _cacheable, _shared_ttl)
+    @single_flight('release_dates')
     def get_release_dates(imdb_id):
         logger.info(f"MetadataManager: Getting release dates for IMDB ID: {imdb_id}")
         with Session() as session:
             item = session.query(Item).filter_by(imdb_id=imdb_id).first()
             if item:
-                metadata = next((m for m in item.item_metadata if m.key == 'release_dates'), None)
-                if metadata:
-                    if MetadataManager.is_metadata_stale(metadata.last_updated):
+                stored_release_dates, release_dates_updated = MetadataManager._battery_release_dates(session, item)
+                if release_dates_updated:
+                    if MetadataManager.is_metadata_stale(release_dates_updated, item):
+                        if MetadataManager._revalidate_in_background('release_dates', imdb_id):
+                            logger.info(f"Serving stale release dates for IMDB ID: {imdb_id} while they refresh in the background.")
+                            return stored_release_dates, STALE_SOURCE
                         logger.info(f"Release dates for IMDB ID: {imdb_id} are stale. Refreshing from Trakt.")
-                        return MetadataManager.refresh_release_dates(imdb_id, session)
+                        release_dates, source = MetadataManager.refresh_release_dates(imdb_id, session)
+                        if release_dates:
+                            return release_dates, source
+                        return stored_release_dates, STALE_SOURCE
                     else:
                         logger.info(f"Using fresh release dates from battery for IMDB ID: {imdb_id}")
-                        try:
-                            value = json.loads(metadata.value) if isinstance(metadata.value, str) else metadata.value
-                            return value, "battery"
-                        except json.JSONDecodeError:
-                            return metadata.value, "battery"
+                        return stored_release_dates, "battery"
 
             # Fetch from Trakt if not in database or if metadata is missing
             return MetadataManager.refresh_release_dates(imdb_id, session)
@@ -505,6 +796,8 @@ class MetadataManager:
         return None, None
 
     @staticmethod
+    @cached_result('tmdb_to_imdb', _cacheable)
+    @single_flight('tmdb_to_imdb')
     def tmdb_to_imdb(tmdb_id):
         with Session() as session:
             # Check if the mapping exists in the cache
@@ -525,6 +818,7 @@ class MetadataManager:
             return imdb_id, source
                 
     @staticmethod
+    @single_flight('episode_metadata')
     def get_metadata_by_episode_imdb(episode_imdb_id):
         with Session() as session:
             # Find the episode by IMDb ID
@@ -534,12 +828,8 @@ class MetadataManager:
 
             if episode:
                 show = episode.season.item
-                show_metadata = {}
-                for m in show.item_metadata:
-                    try:
-                        show_metadata[m.key] = json.loads(m.value) if isinstance(m.value, str) else m.value
-                    except json.JSONDecodeError:
-                        show_metadata[m.key] = m.value
+                access_tracker.record(show.imdb_id)
+                show_metadata = MetadataManager._battery_show_metadata(session, show)
 
                 episode_data = {
                     'title': episode.title,
@@ -587,14 +877,17 @@ class MetadataManager:
                 )
                 session.add(episode)
                 session.commit()
+            result_cache.invalidate(show_imdb_id)
 
             return {'show': show_metadata, 'episode': episode_data}, "trakt"
 
         return None, None
 
     @staticmethod
+    @tracks_access
+    @cached_result('movie_metadata', _cacheable, _shared_ttl)
+    @single_flight('movie_metadata')
     def get_movie_metadata(imdb_id):
-        settings = Settings()
         trakt = TraktMetadata()
 
         with Session() as session:
@@ -604,57 +897,152 @@ class MetadataManager:
                 if item.updated_at.tzinfo is None:
                     item.updated_at = item.updated_at.replace(tzinfo=timezone.utc)
                 
-                if MetadataManager.is_metadata_stale(item.updated_at):
+                if MetadataManager.is_metadata_stale(item.updated_at, item):
+                    if MetadataManager._revalidate_in_background('movie', imdb_id):
+                        logger.info(f"Serving stale metadata for IMDB ID: {imdb_id} while it refreshes in the background.")
+                        return MetadataManager._battery_movie_metadata(session, item), STALE_SOURCE
                     logger.info(f"Metadata for IMDB ID: {imdb_id} is stale. Refreshing from Trakt.")
                     movie_data = trakt.get_movie_metadata(imdb_id)
                     if movie_data:
                         MetadataManager.update_movie_metadata(item, movie_data, session)
                         return movie_data, "trakt (refreshed)"
+                    logger.warning(f"Could not refresh metadata for IMDB ID: {imdb_id}, serving stale battery data.")
+                    return MetadataManager._battery_movie_metadata(session, item), STALE_SOURCE
                 else:
                     logger.info(f"Using fresh metadata from battery for IMDB ID: {imdb_id}")
-                    metadata = session.query(Metadata).filter_by(item_id=item.id).all()
-                    metadata_dict = {}
-                    for m in metadata:
-                        if m.key == 'release_dates':
-                            if isinstance(m.value, str):
-                                try:
-                                    metadata_dict[m.key] = json.loads(m.value)
-                                except json.JSONDecodeError:
-                                    metadata_dict[m.key] = m.value
-                            else:
-                                metadata_dict[m.key] = m.value
-                        else:
-                            metadata_dict[m.key] = m.value
-
-                    return metadata_dict, "battery"
+                    return MetadataManager._battery_movie_metadata(session, item), "battery"
 
             # If the item doesn't exist in our database, fetch it from Trakt
             movie_data = trakt.get_movie_metadata(imdb_id)
             if movie_data:
-                item = Item(imdb_id=imdb_id, title=movie_data.get('title'), type='movie', year=movie_data.get('year'))
-                session.add(item)
-                session.flush()
-                MetadataManager.update_movie_metadata(item, movie_data, session)
-                logger.info(f"Retrieved and stored movie metadata for IMDB ID: {imdb_id} from Trakt")
+                MetadataManager._store_new_movie(session, imdb_id, movie_data)
                 return movie_data, "trakt"
 
             logger.warning(f"No movie metadata found for IMDB ID: {imdb_id}")
             return None, None
-        
+
+    @staticmethod
+    def _battery_movie_metadata(session, item):
+        document = DatabaseManager.get_metadata_document(session, item.id)
+        if document is not None:
+            return document[0]
+        metadata = session.query(Metadata).filter_by(item_id=item.id).all()
+        metadata_dict = {}
+        for m in metadata:
+            if m.key == 'release_dates':
+                if isinstance(m.value, str):
+                    try:
+                        metadata_dict[m.key] = json.loads(m.value)
+                    except json.JSONDecodeError:
+                        metadata_dict[m.key] = m.value
+                else:
+                    metadata_dict[m.key] = m.value
+            else:
+                metadata_dict[m.key] = m.value
+        return metadata_dict
+
+    @staticmethod
+    def _store_new_movie(session, imdb_id, movie_data):
+        item = Item(imdb_id=imdb_id, title=movie_data.get('title'), type='movie', year=movie_data.get('year'))
+        session.add(item)
+        session.flush()
+        MetadataManager.update_movie_metadata(item, movie_data, session)
+        logger.info(f"Retrieved and stored movie metadata for IMDB ID: {imdb_id} from Trakt")
+        return item
+
+    @staticmethod
+    def _battery_release_dates(session, item):
+        document = DatabaseManager.get_metadata_document(session, item.id)
+        if document is not None:
+            metadata, updated_at = document
+            if 'release_dates' not in metadata:
+                return None, None
+            # The release dates are always the last write to a movie's document
+            return metadata['release_dates'], updated_at
+        metadata = next((m for m in item.item_metadata if m.key == 'release_dates'), None)
+        if not metadata:
+            return None, None
+        try:
+            value = json.loads(metadata.value) if isinstance(metadata.value, str) else metadata.value
+        except json.JSONDecodeError:
+            value = metadata.value
+        return value, metadata.last_updated
+
+    @staticmethod
+    @tracks_access
+    @cached_result('movie_bundle', _cacheable, _shared_ttl)
+    @single_flight('movie_bundle')
+    def get_movie_metadata_with_release_dates(imdb_id):
+        """Movie metadata and release dates for one RPC.
+
+        Works out which of the two are missing or stale, fetches only those
+        from Trakt (concurrently) and stores them. Returns
+        (metadata, source, release_dates, release_dates_source).
+        """
+        trakt = TraktMetadata()
+        plan = FetchPlan(trakt)
+        metadata = release_dates = None
+        source = release_dates_source = None
+
+        with Session() as session:
+            item = session.query(Item).filter_by(imdb_id=imdb_id, type='movie').first()
+            stale = item is not None and MetadataManager.is_metadata_stale(item.updated_at, item)
+            if item and (not stale or MetadataManager._revalidate_in_background('movie', imdb_id)):
+                source = STALE_SOURCE if stale else "battery"
+                logger.info(f"Using {source} metadata for IMDB ID: {imdb_id}")
+                metadata = MetadataManager._battery_movie_metadata(session, item)
+                stored_release_dates, release_dates_updated = MetadataManager._battery_release_dates(session, item)
+                if stored_release_dates:
+                    # A queued movie refresh fetches release dates as well
+                    if stale:
+                        release_dates, release_dates_source = stored_release_dates, STALE_SOURCE
+                    elif not MetadataManager.is_metadata_stale(release_dates_updated, item):
+                        release_dates, release_dates_source = stored_release_dates, "battery"
+                    elif MetadataManager._revalidate_in_background('release_dates', imdb_id):
+                        release_dates, release_dates_source = stored_release_dates, STALE_SOURCE
+
+            # Storing movie metadata replaces every metadata row, release dates
+            # included, so a movie refresh always re-fetches them alongside.
+            if metadata is None:
+                plan.need(MOVIE, imdb_id)
+            if metadata is None or release_dates is None:
+                plan.need(MOVIE_RELEASES, imdb_id)
+            if not plan:
+                return metadata, source, release_dates, release_dates_source
+
+            results = plan.execute()
+            movie_data = results.get((MOVIE, imdb_id))
+            if movie_data:
+                if item:
+                    MetadataManager.update_movie_metadata(item, movie_data, session)
+                    metadata, source = movie_data, "trakt (refreshed)"
+                else:
+                    item = MetadataManager._store_new_movie(session, imdb_id, movie_data)
+                    metadata, source = movie_data, "trakt"
+            elif metadata is None and item:
+                # Trakt failed, fall back to whatever the battery holds
+                metadata, source = MetadataManager._battery_movie_metadata(session, item), STALE_SOURCE
+
+        trakt_release_dates = results.get((MOVIE_RELEASES, imdb_id))
+        if trakt_release_dates:
+            if item:
+                MetadataManager.add_or_update_metadata(imdb_id, {'release_dates': trakt_release_dates}, 'Trakt')
+                logger.info(f"Retrieved and stored release dates for IMDB ID: {imdb_id} from Trakt")
+            release_dates, release_dates_source = trakt_release_dates, "trakt"
+
+        if metadata is None:
+            logger.warning(f"No movie metadata found for IMDB ID: {imdb_id}")
+        return metadata, source, release_dates, release_dates_source
 
     @staticmethod
     def update_movie_metadata(item, movie_data, session):
-        item.updated_at = datetime.now(timezone.utc)
-        session.query(Metadata).filter_by(item_id=item.id).delete()
-        for key, value in movie_data.items():
-            if isinstance(value, (list, dict)):
-                value = json.dumps(value)
-            metadata = Metadata(item_id=item.id, key=key, value=str(value), provider='trakt')
-            session.add(metadata)
-        session.commit()
+        MetadataManager._replace_metadata(item, movie_data, session)
 
 
     @staticmethod
+    @tracks_access
+    @cached_result('show_metadata', _cacheable, _shared_ttl)
+    @single_flight('show_metadata')
     def get_show_metadata(imdb_id):
 
         with Session() as session:
@@ -664,53 +1052,141 @@ class MetadataManager:
                 if item.updated_at.tzinfo is None:
                     item.updated_at = item.updated_at.replace(tzinfo=timezone.utc)
                 
-                if MetadataManager.is_metadata_stale(item.updated_at):
+                if MetadataManager.is_metadata_stale(item.updated_at, item):
+                    if MetadataManager._revalidate_in_background('show', imdb_id):
+                        logger.info(f"Serving stale metadata for IMDB ID: {imdb_id} while it refreshes in the background.")
+                        return MetadataManager._battery_show_metadata(session, item), STALE_SOURCE
                     logger.info(f"Metadata for IMDB ID: {imdb_id} is stale. Refreshing from Trakt.")
                     trakt = TraktMetadata()
                     show_data = trakt.get_show_metadata(imdb_id)
                     if show_data:
                         MetadataManager.update_show_metadata(item, show_data, session)
                         return show_data, "trakt (refreshed)"
+                    logger.warning(f"Could not refresh metadata for IMDB ID: {imdb_id}, serving stale battery data.")
+                    return MetadataManager._battery_show_metadata(session, item), STALE_SOURCE
                 else:
                     logger.info(f"Using fresh metadata from battery for IMDB ID: {imdb_id}")
-                    metadata = session.query(Metadata).filter_by(item_id=item.id).all()
-                    metadata_dict = {}
-                    for m in metadata:
-                        try:
-                            metadata_dict[m.key] = json.loads(m.value) if isinstance(m.value, str) else m.value
-                        except json.JSONDecodeError:
-                            metadata_dict[m.key] = m.value
-
-                    return metadata_dict, "battery"
+                    return MetadataManager._battery_show_metadata(session, item), "battery"
 
             # Fetch from Trakt if not in database
             trakt = TraktMetadata()
             show_data = trakt.get_show_metadata(imdb_id)
             if show_data:
-                try:
-                    item = Item(imdb_id=imdb_id, title=show_data.get('title'), type='show', year=show_data.get('year'))
-                    session.add(item)
-                    session.flush()
-                    MetadataManager.update_show_metadata(item, show_data, session)
-                    logger.info(f"Retrieved and stored show metadata for IMDB ID: {imdb_id} from Trakt")
-                except IntegrityError:
-                    session.rollback()
-                    logger.warning(f"IntegrityError occurred. Item may already exist for IMDB ID: {imdb_id}")
-                    # Update existing item and metadata
-
+                MetadataManager._store_new_show(session, imdb_id, show_data)
                 return show_data, "trakt"
 
             logger.warning(f"No show metadata found for IMDB ID: {imdb_id}")
             return None, None
 
+    @staticmethod
+    def _battery_show_metadata(session, item):
+        document = DatabaseManager.get_metadata_document(session, item.id)
+        if document is not None:
+            return document[0]
+        return DatabaseManager.decode_metadata_rows(session.query(Metadata).filter_by(item_id=item.id))
+
+    @staticmethod
+    def _store_new_show(session, imdb_id, show_data):
+        try:
+            item = Item(imdb_id=imdb_id, title=show_data.get('title'), type='show', year=show_data.get('year'))
+            session.add(item)
+            session.flush()
+            MetadataManager.update_show_metadata(item, show_data, session)
+            logger.info(f"Retrieved and stored show metadata for IMDB ID: {imdb_id} from Trakt")
+            return item
+        except IntegrityError:
+            session.rollback()
+            logger.warning(f"IntegrityError occurred. Item may already exist for IMDB ID: {imdb_id}")
+            return session.query(Item).filter_by(imdb_id=imdb_id).first()
+
+    @staticmethod
+    @tracks_access
+    @cached_result('show_bundle', _cacheable, _shared_ttl)
+    @single_flight('show_bundle')
+    def get_show_metadata_with_seasons(imdb_id):
+        """Show metadata and seasons for one RPC.
+
+        Show metadata already embeds the seasons payload, so a single
+        /seasons download serves both stores. Returns
+        (metadata, source, seasons, seasons_source).
+        """
+        plan = MetadataManager._show_plan()
+        metadata = seasons_data = None
+        source = seasons_source = None
+
+        with Session() as session:
+            item = session.query(Item).filter_by(imdb_id=imdb_id, type='show').first()
+            streamed = MetadataManager._streams_seasons(item and item.id)
+            stale = item is not None and MetadataManager.is_metadata_stale(item.updated_at, item)
+            if item and (not stale or MetadataManager._revalidate_in_background('show', imdb_id)):
+                source = STALE_SOURCE if stale else "battery"
+                logger.info(f"Using {source} metadata for IMDB ID: {imdb_id}")
+                metadata = MetadataManager._battery_show_metadata(session, item)
+                seasons = session.query(Season).filter_by(item_id=item.id).options(selectinload(Season.episodes)).all()
+                if seasons:
+                    seasons_data, seasons_source = MetadataManager.format_seasons_data(seasons), source
+
+            if metadata is None:
+                plan.need(SHOW, imdb_id)
+            if seasons_data is None:
+                plan.need(SHOW_SEASONS, imdb_id)
+            if not plan:
+                return metadata, source, seasons_data, seasons_source
+
+            results = plan.execute()
+            trakt_seasons = results.get((SHOW_SEASONS, imdb_id))
+            show_data = results.get((SHOW, imdb_id))
+            if show_data:
+                show_data['seasons'] = trakt_seasons
+                if item:
+                    MetadataManager.update_show_metadata(item, show_data, session)
+                    metadata, source = show_data, "trakt (refreshed)"
+                else:
+                    item = MetadataManager._store_new_show(session, imdb_id, show_data)
+                    metadata, source = show_data, "trakt"
+            elif metadata is None and item:
+                # Trakt failed, fall back to whatever the battery holds
+                metadata, source = MetadataManager._battery_show_metadata(session, item), STALE_SOURCE
+
+        if trakt_seasons:
+            if not streamed:
+                MetadataManager.add_or_update_seasons_and_episodes(imdb_id, trakt_seasons)
+            logger.info(f"Retrieved and stored seasons and episodes data from Trakt for IMDB ID: {imdb_id}")
+            seasons_data, seasons_source = trakt_seasons, "trakt"
+
+        if metadata is None:
+            logger.warning(f"No show metadata found for IMDB ID: {imdb_id}")
+        return metadata, source, seasons_data, seasons_source
+
     @staticmethod
     def update_show_metadata(item, show_data, session):
+        MetadataManager._replace_metadata(item, show_data, session)
+
+    @staticmethod
+    def _replace_metadata(item, data, session):
+        # Keys missing from the new payload are dropped and the rest written
+        # with a single upsert, instead of deleting and re-inserting every row.
+        imdb_id = item.imdb_id
         item.updated_at = datetime.now(timezone.utc)
-        session.query(Metadata).filter_by(item_id=item.id).delete()
-        for key, value in show_data.items():
+        item.ttl_seconds = int(TTLPolicy.ttl_for(item, data).total_seconds())
+        DatabaseManager.index_for_search(session, [DatabaseManager.search_entry_row(item, data)])
+        if DatabaseManager.uses_metadata_documents():
+            DatabaseManager.write_metadata_document(session, item.id, data, 'trakt')
+            session.commit()
+            result_cache.invalidate(imdb_id)
+            return
+        now = datetime.utcnow()
+        rows = []
+        for key, value in data.items():
             if isinstance(value, (list, dict)):
                 value = json.dumps(value)
-            metadata = Metadata(item_id=item.id, key=key, value=str(value), provider='trakt')
-            session.add(metadata)
+            rows.append({'item_id': item.id, 'key': key, 'value': str(value), 'provider': 'trakt', 'last_updated': now})
+        session.query(Metadata).filter(
+            Metadata.item_id == item.id, Metadata.key.notin_(list(data))
+        ).delete(synchronize_session=False)
+        upsert_rows(session, Metadata.__table__, rows, ['item_id', 'key'], ['value', 'provider', 'last_updated'])
         session.commit()
+        result_cache.invalidate(imdb_id)
+
 
+stats_snapshot = StatsSnapshot(MetadataManager._compute_stats)
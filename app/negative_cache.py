@@ -0,0 +1,142 @@
+import threading
+from datetime import datetime, timedelta
+from app import maintenance
+from app.database import IndependentSession, NegativeLookup, upsert_rows
+from app.logger_config import logger
+from app.settings import Settings
+
+# Keys remembered as having no entry, so found lookups don't query the table
+# before every Trakt request; the set is dropped when it grows past this.
+MAX_ABSENT_KEYS = 100000
+
+class NegativeLookupCache:
+    """Persisted record of lookups Trakt answered with "not found".
+
+    Keys are (kind, id): 'movie', 'show' or 'episode' with an IMDb ID, or
+    'tmdb' with a TMDB ID. Only a 404 or an empty search result counts;
+    timeouts, 5xx and an open circuit breaker say nothing about the ID.
+    A miss holds off Trakt for negative_cache_ttl seconds, doubling with
+    every consecutive miss up to negative_cache_max_ttl.
+
+    Entries are kept in memory; the table backs them across restarts and
+    replicas. This runs from the Trakt client, inside other sessions, so
+    it reads with its own session and leaves writes to flush(), which the
+    maintenance thread runs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # (kind, lookup_id) -> (misses, retry_at)
+        self._absent = set()  # keys known to have no entry
+        self._unsaved = {}  # key -> row to upsert, or None to delete
+        self.skipped = 0
+        self.recorded = 0
+
+    def _load(self, key):
+        """(misses, retry_at) for key, reading the table if memory doesn't know it."""
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+            if key in self._absent:
+                return None
+        with IndependentSession() as session:
+            entry = session.get(NegativeLookup, key)
+            known = (entry.misses, entry.retry_at) if entry else None
+        with self._lock:
+            if known is not None:
+                self._entries[key] = known
+            else:
+                if len(self._absent) >= MAX_ABSENT_KEYS:
+                    self._absent.clear()
+                self._absent.add(key)
+        return known
+
+    def is_missing(self, kind, lookup_id):
+        """True while Trakt should not be asked for lookup_id again."""
+        if not lookup_id or Settings().negative_cache_ttl <= 0:
+            return False
+        known = self._load((kind, str(lookup_id)))
+        if known is None or known[1] <= datetime.utcnow():
+            return False
+        with self._lock:
+            self.skipped += 1
+        logger.info(f"Not asking Trakt for {kind} {lookup_id} again before {known[1].isoformat()}, it was not found")
+        return True
+
+    def record_missing(self, kind, lookup_id):
+        settings = Settings()
+        if not lookup_id or settings.negative_cache_ttl <= 0:
+            return
+        key = (kind, str(lookup_id))
+        with self._lock:
+            # Another replica may have recorded it since we last looked
+            self._absent.discard(key)
+        known = self._load(key)
+        now = datetime.utcnow()
+        with self._lock:
+            known = self._entries.get(key, known)
+            if known is not None and known[1] > now:
+                # Another request for the same lookup already counted this miss
+                return
+            misses = (known[0] if known else 0) + 1
+            backoff = min(settings.negative_cache_ttl * 2 ** (misses - 1), settings.negative_cache_max_ttl)
+            retry_at = now + timedelta(seconds=backoff)
+            self._entries[key] = (misses, retry_at)
+            self._unsaved[key] = {'kind': key[0], 'lookup_id': key[1], 'misses': misses,
+                                  'last_missed': now, 'retry_at': retry_at}
+            self.recorded += 1
+        logger.info(f"Trakt has no {kind} {lookup_id} (miss {misses}), checking again in {int(backoff)}s")
+
+    def record_found(self, kind, lookup_id):
+        """Forget an earlier miss, resetting the backoff."""
+        key = (kind, str(lookup_id))
+        with self._lock:
+            if self._entries.pop(key, None) is None:
+                return
+            self._absent.add(key)
+            self._unsaved[key] = None
+
+    def flush(self):
+        """Write misses and clears recorded since the last flush to the table."""
+        with self._lock:
+            unsaved, self._unsaved = self._unsaved, {}
+        if not unsaved:
+            return 0
+        rows = [row for row in unsaved.values() if row is not None]
+        cleared = [key for key, row in unsaved.items() if row is None]
+        try:
+            with IndependentSession() as session:
+                upsert_rows(session, NegativeLookup.__table__, rows, ['kind', 'lookup_id'],
+                            ['misses', 'last_missed', 'retry_at'])
+                for kind, lookup_id in cleared:
+                    session.query(NegativeLookup).filter_by(kind=kind, lookup_id=lookup_id).delete()
+                session.commit()
+        except Exception as e:
+            # Only costs another Trakt request later; keep them for the next flush
+            logger.warning(f"Could not persist {len(unsaved)} not-found entries: {str(e)}")
+            with self._lock:
+                for key, row in unsaved.items():
+                    self._unsaved.setdefault(key, row)
+            return 0
+        return len(unsaved)
+
+    def purge(self):
+        """Drop entries that have been due for a re-check for longer than negative_cache_max_ttl."""
+        cutoff = datetime.utcnow() - timedelta(seconds=Settings().negative_cache_max_ttl)
+        with IndependentSession() as session:
+            purged = session.query(NegativeLookup).filter(NegativeLookup.retry_at < cutoff).delete()
+            session.commit()
+        with self._lock:
+            for key in [key for key, (_, retry_at) in self._entries.items() if retry_at < cutoff]:
+                del self._entries[key]
+        if purged:
+            logger.info(f"Purged {purged} expired not-found entries")
+        return purged
+
+    def get_stats(self):
+        with self._lock:
+            return {'known': len(self._entries), 'skipped': self.skipped, 'recorded': self.recorded}
+
+negative_cache = NegativeLookupCache()
+maintenance.on_flush(negative_cache.flush)
+maintenance.on_eviction(negative_cache.purge)
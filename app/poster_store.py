@@ -0,0 +1,61 @@
+import hashlib
+import os
+import tempfile
+from app.logger_config import logger
+
+POSTER_DIR = '/user/db_content/posters'
+
+class PosterStore:
+    """Content-addressed image files on disk, keyed by their SHA-256.
+
+    The database only keeps the hash; identical images are stored once.
+    Files live under <root>/<hash[:2]>/<hash>, so no single directory gets
+    too large.
+    """
+
+    def __init__(self, root=POSTER_DIR):
+        self.root = root
+
+    @staticmethod
+    def hash_of(data):
+        return hashlib.sha256(data).hexdigest()
+
+    def path(self, content_hash):
+        return os.path.join(self.root, content_hash[:2], content_hash)
+
+    def exists(self, content_hash):
+        return bool(content_hash) and os.path.exists(self.path(content_hash))
+
+    def put(self, data):
+        """Store data unless it is already present; returns its hash."""
+        content_hash = self.hash_of(data)
+        target = self.path(content_hash)
+        if os.path.exists(target):
+            return content_hash
+        directory = os.path.dirname(target)
+        os.makedirs(directory, exist_ok=True)
+        # Write then rename so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, target)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        logger.debug(f"Stored poster {content_hash} ({len(data)} bytes)")
+        return content_hash
+
+    def delete(self, content_hash):
+        try:
+            os.remove(self.path(content_hash))
+            logger.debug(f"Removed poster {content_hash}")
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.error(f"Could not remove poster {content_hash}: {str(e)}")
+            return False
+
+poster_store = PosterStore()
@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from app.logger_config import logger
+from app.settings import Settings
+from app.single_flight import copy_result
+from app.shared_cache import get_shared_cache, LOCK_POLL_INTERVAL
+
+class ResultCache:
+    """Size- and TTL-bounded LRU cache of formatted lookup results.
+
+    Entries are keyed by (operation, id) and tagged with the IMDb ID they
+    describe, so a write can drop every cached view of that item with
+    invalidate(). A load that started before an invalidation of its tag is
+    not stored, so a slow reader can't put back data a writer just replaced.
+
+    Behind it sits the shared tier from get_shared_cache(), common to all
+    replicas; invalidations are passed on to it and come back from other
+    replicas through its subscription.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, tag, value)
+        self._keys_by_tag = {}
+        self._generations = {}
+        self._shared = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.shared_hits = 0
+        self.lock_waits = 0
+
+    def shared(self):
+        if self._shared is None:
+            with self._lock:
+                if self._shared is None:
+                    shared = get_shared_cache()
+                    shared.subscribe(self._invalidate_local)
+                    self._shared = shared
+        return self._shared
+
+    def get(self, key):
+        """(True, value) on a hit, (False, generation) on a miss; pass the generation to put()."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, copy_result(entry[2])
+                self._discard(key)
+            self.misses += 1
+            return False, self._generations.get(key[1], 0)
+
+    def put(self, key, tag, value, generation):
+        settings = Settings()
+        if settings.result_cache_size <= 0:
+            return False
+        with self._lock:
+            if self._generations.get(tag, 0) != generation:
+                return False
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + settings.result_cache_ttl, tag, copy_result(value))
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > settings.result_cache_size:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+            return True
+
+    def is_current(self, tag, generation):
+        """False if tag was invalidated since get() handed out generation."""
+        with self._lock:
+            return self._generations.get(tag, 0) == generation
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_tag.get(entry[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_tag[entry[1]]
+
+    def invalidate(self, *tags):
+        tags = [tag for tag in tags if tag]
+        if not tags:
+            return
+        self._invalidate_local(tags)
+        self.shared().invalidate(tags)
+
+    def _invalidate_local(self, tags):
+        with self._lock:
+            for tag in tags:
+                if not tag:
+                    continue
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in list(self._keys_by_tag.get(tag, ())):
+                    self._discard(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+            self._generations.clear()
+        logger.info("Result cache cleared")
+
+    def get_stats(self):
+        settings = Settings()
+        # shared() takes _lock itself the first time round
+        shared = self.shared()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': settings.result_cache_size,
+                'ttl': settings.result_cache_ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'shared_hits': self.shared_hits,
+                'lock_waits': self.lock_waits,
+                'shared': shared.get_stats()
+            }
+
+result_cache = ResultCache()
+
+def cached_result(operation, cacheable, shared_ttl=None):
+    """Serve the decorated lookup from result_cache, keyed by (operation, first argument).
+
+    Misses go to the shared tier next. If that misses too, a fleet-wide
+    lock makes one replica run the lookup while the others wait for its
+    result. Only results for which cacheable(result) is true are stored,
+    and neither tier keeps a result whose item was invalidated while it
+    was loading. shared_ttl(id) gives their lifetime in the shared tier,
+    0 or less to keep them out of it.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(lookup_id, *args, **kwargs):
+            key = (operation, lookup_id)
+            hit, value = result_cache.get(key)
+            if hit:
+                return value
+            generation = value
+            shared = result_cache.shared()
+
+            value = shared.get(lookup_id, operation)
+            if value is not None:
+                result_cache.shared_hits += 1
+                result_cache.put(key, lookup_id, value, generation)
+                return value
+
+            lock_name = f'{operation}:{lookup_id}'
+            lock_timeout = Settings().shared_cache_lock_timeout
+            token = shared.acquire_lock(lock_name, lock_timeout)
+            if token is None:
+                # Another replica is loading it: wait, then take its result
+                result_cache.lock_waits += 1
+                deadline = time.monotonic() + lock_timeout
+                while shared.is_locked(lock_name) and time.monotonic() < deadline:
+                    time.sleep(LOCK_POLL_INTERVAL)
+                value = shared.get(lookup_id, operation)
+                if value is not None:
+                    result_cache.shared_hits += 1
+                    result_cache.put(key, lookup_id, value, generation)
+                    return value
+
+            version = shared.version(lookup_id) if shared.enabled else None
+            try:
+                result = func(lookup_id, *args, **kwargs)
+                if cacheable(result):
+                    result_cache.put(key, lookup_id, result, generation)
+                    # Like put(), skip the shared tier if the item changed during the load
+                    if shared.enabled and result_cache.is_current(lookup_id, generation):
+                        ttl = shared_ttl(lookup_id) if shared_ttl else Settings().shared_cache_max_ttl
+                        if ttl > 0:
+                            shared.set(lookup_id, operation, result, ttl, version)
+                return result
+            finally:
+                if token:
+                    shared.release_lock(lock_name, token)
+        return wrapper
+    return decorator
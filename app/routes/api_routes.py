@@ -1,13 +1,26 @@
-from flask import jsonify, Blueprint
+from flask import jsonify, Blueprint, send_file, request
 from app.settings import Settings
 from app.metadata_manager import MetadataManager
 from app.logger_config import logger
+from app.trakt_scheduler import trakt_scheduler
+from app.circuit_breaker import trakt_breaker
+from app.background_refresh import background_refresher
+from app.database import get_pool_status
+from app.poster_store import poster_store
+from app.result_cache import result_cache
+from app.negative_cache import negative_cache
 import json
 
 settings = Settings()
 
 api_bp = Blueprint('api', __name__)
 
+# Seconds clients may reuse a poster before revalidating its ETag
+POSTER_MAX_AGE = 86400
+
+ITEMS_PAGE_SIZE = 50
+MAX_ITEMS_PAGE_SIZE = 200
+
 @api_bp.route('/api/movie/metadata/<imdb_id>', methods=['GET'])
 def get_movie_metadata(imdb_id):
     try:
@@ -93,6 +106,25 @@ def get_show_seasons(imdb_id):
         logger.error(f"Error fetching seasons: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@api_bp.route('/api/poster/<imdb_id>', methods=['GET'])
+def get_poster(imdb_id):
+    try:
+        content_hash = MetadataManager.get_poster(imdb_id)
+        if not content_hash:
+            return jsonify({"error": "Poster not found"}), 404
+        # The file is streamed from disk; the hash doubles as a strong ETag
+        # so clients revalidate with If-None-Match and get a 304.
+        return send_file(
+            poster_store.path(content_hash),
+            mimetype='image/jpeg',
+            etag=content_hash,
+            max_age=POSTER_MAX_AGE,
+            conditional=True
+        )
+    except Exception as e:
+        logger.error(f"Error fetching poster: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @api_bp.route('/api/tmdb_to_imdb/<tmdb_id>', methods=['GET'])
 def tmdb_to_imdb(tmdb_id):
     try:
@@ -108,3 +140,61 @@ def tmdb_to_imdb(tmdb_id):
     except Exception as e:
         logger.error(f"Error in tmdb_to_imdb conversion: {str(e)}", exc_info=True)
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+
+@api_bp.route('/api/items', methods=['GET'])
+def list_items():
+    try:
+        cursor = request.args.get('cursor', type=int)
+        limit = min(max(request.args.get('limit', ITEMS_PAGE_SIZE, type=int), 1), MAX_ITEMS_PAGE_SIZE)
+        stale = request.args.get('stale')
+        if stale is not None:
+            stale = stale.lower() in ('1', 'true', 'yes')
+        page = MetadataManager.list_items(
+            after_id=cursor,
+            limit=limit,
+            item_type=request.args.get('type') or None,
+            stale=stale,
+            provider=request.args.get('provider') or None
+        )
+        return jsonify(page)
+    except Exception as e:
+        logger.error(f"Error listing items: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@api_bp.route('/api/search', methods=['GET'])
+def search_titles():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Missing search query (q)"}), 400
+    try:
+        results = MetadataManager.search_titles(
+            query,
+            item_type=request.args.get('type') or None,
+            year=request.args.get('year', type=int),
+            limit=request.args.get('limit', 10, type=int)
+        )
+        return jsonify({"results": results})
+    except Exception as e:
+        logger.error(f"Error searching titles: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@api_bp.route('/api/stats/trakt_scheduler', methods=['GET'])
+def trakt_scheduler_stats():
+    return jsonify(trakt_scheduler.get_metrics())
+
+@api_bp.route('/api/stats/trakt_health', methods=['GET'])
+def trakt_health_stats():
+    return jsonify({
+        'circuit_breaker': trakt_breaker.get_status(),
+        'pending_background_refreshes': background_refresher.pending()
+    })
+
+@api_bp.route('/api/stats/db_pool', methods=['GET'])
+def db_pool_stats():
+    return jsonify(get_pool_status())
+
+@api_bp.route('/api/stats/cache', methods=['GET'])
+def result_cache_stats():
+    stats = result_cache.get_stats()
+    stats['not_found'] = negative_cache.get_stats()
+    return jsonify(stats)
@@ -3,7 +3,7 @@ from app.settings import Settings
 from app.metadata_manager import MetadataManager
 import io
 from app.logger_config import logger
-from app.trakt_auth import TraktAuth
+from app.trakt_auth import trakt_auth
 from flask import flash
 from sqlalchemy import inspect
 from app.database import Session, Item, Metadata, Season, Poster  # Add this line
@@ -21,21 +21,23 @@ def providers():
     settings = Settings()
     providers = settings.providers
     
-    # Ensure all providers have both rank types
+    # Ensure all providers have both rank types, persisting only if one was missing
+    ranks_added = False
     for i, provider in enumerate(providers, start=1):
         if 'metadata_rank' not in provider:
             provider['metadata_rank'] = i
+            ranks_added = True
         if 'poster_rank' not in provider:
             provider['poster_rank'] = i
+            ranks_added = True
     
-    settings.providers = providers
-    settings.save()
+    if ranks_added:
+        settings.save()
     
     any_provider_enabled = any(provider['enabled'] for provider in providers)
     
     # Check if Trakt is authenticated and enabled
-    trakt = TraktAuth()
-    trakt_authenticated = trakt.is_authenticated()
+    trakt_authenticated = trakt_auth.is_authenticated()
     trakt_enabled = next((provider['enabled'] for provider in providers if provider['name'] == 'trakt'), False)
     
     return render_template('providers.html', 
@@ -100,7 +102,7 @@ def update_provider_rank():
 
 @settings_bp.route('/settings')
 def settings_page():
-    return render_template('settings.html', settings=settings.get_all())
+    return render_template('settings.html', settings=Settings().get_all())
 
 @settings_bp.route('/save_settings', methods=['POST'])
 def save_settings():
@@ -5,7 +5,7 @@ import io
 from app.trakt_auth import TraktAuth
 from flask import flash
 from sqlalchemy import inspect
-from app.database import Session, Item, Metadata, Season, Poster  # Add this line
+from app.database import Session, Item, Metadata, Season, Poster, DatabaseManager  # Add this line
 from app.trakt_metadata import TraktMetadata  # Add this import at the top of the file
 import json
 import time
@@ -30,15 +30,8 @@ def home():
 
 @main_bp.route('/debug')
 def debug():
-    items = MetadataManager.get_all_items()
-    for item in items:
-        # Find the year from metadata
-        year_metadata = next((m.value for m in item.item_metadata if m.key == 'year'), None)
-        
-        # Use the metadata year if available, otherwise use the item's year
-        item.display_year = year_metadata or item.year
-        
-    return render_template('debug.html', items=items)
+    # Items are fetched page by page from /api/items by the template
+    return render_template('debug.html')
 
 @main_bp.route('/debug/delete_item/<imdb_id>', methods=['POST'])
 def delete_item(imdb_id):
@@ -72,6 +65,9 @@ def debug_item(imdb_id):
             return jsonify({"error": f"No item found for IMDB ID: {imdb_id}"}), 404
         
         metadata = {m.key: m.value for m in item.item_metadata}
+        document = DatabaseManager.get_metadata_document(session, item.id)
+        if document is not None:
+            metadata = document[0]
         seasons = [{'season': s.season_number, 'episode_count': s.episode_count} for s in item.seasons]
         
         return jsonify({
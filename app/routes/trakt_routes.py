@@ -2,7 +2,7 @@ from flask import Flask, render_template, request, jsonify, send_file, redirect,
 from app.settings import Settings
 from app.metadata_manager import MetadataManager
 import io
-from app.trakt_auth import TraktAuth
+from app.trakt_auth import TraktAuth, reload_trakt_auth
 from app.logger_config import logger
 from flask import flash
 from sqlalchemy import inspect
@@ -65,8 +65,8 @@ def trakt_auth_status():
             trakt_config.pop('device_code_response', None)
             save_trakt_config(trakt_config)
             
-            # Reload Trakt auth
-            trakt.load_auth()
+            # Reload the shared Trakt auth used for API calls
+            reload_trakt_auth()
 
             return jsonify({'status': 'authorized'})
         elif response.status_code == 400:
@@ -123,7 +123,8 @@ def receive_trakt_auth():
         trakt_auth.settings.Trakt['access_token'] = trakt_auth.access_token
         trakt_auth.settings.Trakt['refresh_token'] = trakt_auth.refresh_token
         trakt_auth.settings.Trakt['expires_at'] = trakt_auth.expires_at
-        trakt_auth.settings.save_settings()
+        trakt_auth.settings.save()
+        reload_trakt_auth()
         
         return jsonify({'status': 'success', 'message': 'Trakt auth received and saved successfully'})
     except Exception as e:
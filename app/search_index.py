@@ -0,0 +1,286 @@
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from datetime import timedelta
+from sqlalchemy import text
+from app.database import (
+    Session, Item, Metadata, SearchEntry, DatabaseManager, SEARCH_NAMES_SQL, SEARCH_VECTOR_SQL
+)
+from app.logger_config import logger
+
+# Least trigram similarity for a title to match, pg_trgm's own default
+MIN_SIMILARITY = 0.3
+# A query whose words all appear in the overview scores this much
+TEXT_MATCH_SCORE = 0.5
+EXACT_YEAR_BONUS = 0.1
+# Release years differ between countries, so a year filter allows +/- this
+YEAR_TOLERANCE = 1
+MAX_SEARCH_RESULTS = 50
+# Entries re-read on every refresh of the in-process index, in case a write
+# committed after a newer one had already been picked up.
+REFRESH_OVERLAP = timedelta(seconds=5)
+BACKFILL_BATCH_SIZE = 500
+SEARCH_METADATA_KEYS = ('title', 'original_title', 'aliases', 'overview')
+
+def normalize(value):
+    """Lower-case value with accents and punctuation removed."""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(''.join(c if c.isalnum() else ' ' for c in stripped.lower()).split())
+
+def trigrams(value):
+    """pg_trgm style trigrams: each word padded with two spaces before and one after."""
+    grams = set()
+    for word in normalize(value).split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def similarity(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class _IndexedTitle:
+    __slots__ = ('imdb_id', 'title', 'year', 'type', 'names', 'words')
+
+    def __init__(self, entry):
+        self.imdb_id = entry.imdb_id
+        self.title = entry.title
+        self.year = entry.year
+        self.type = entry.type
+        names = [entry.title] + (entry.aliases or '').splitlines()
+        self.names = [trigrams(name) for name in names if name]
+        self.words = set(normalize(' '.join(names + [entry.overview or ''])).split())
+
+class InMemoryTitleIndex:
+    """Trigram and word inverted index over the search_index table.
+
+    Used where the database has no trigram support, e.g. SQLite. Entries
+    are loaded on first use and topped up from search_index.updated_at
+    before each search. Items deleted since are dropped when they would
+    have been returned.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._titles = {}
+        self._indexed_at = {}
+        self._by_trigram = defaultdict(set)
+        self._by_word = defaultdict(set)
+        self._watermark = None
+
+    def _add(self, entry):
+        self._remove(entry.item_id)
+        indexed = _IndexedTitle(entry)
+        self._titles[entry.item_id] = indexed
+        self._indexed_at[entry.item_id] = entry.updated_at
+        for gram in set().union(*indexed.names):
+            self._by_trigram[gram].add(entry.item_id)
+        for word in indexed.words:
+            self._by_word[word].add(entry.item_id)
+
+    def _remove(self, item_id):
+        self._indexed_at.pop(item_id, None)
+        indexed = self._titles.pop(item_id, None)
+        if indexed is None:
+            return
+        for gram in set().union(*indexed.names):
+            self._by_trigram[gram].discard(item_id)
+        for word in indexed.words:
+            self._by_word[word].discard(item_id)
+
+    def refresh(self, session):
+        with self._lock:
+            if self._watermark is None:
+                changed = session.query(SearchEntry)
+            else:
+                # Cheap look at the overlap window first, then load only what changed
+                recent = session.query(SearchEntry.item_id, SearchEntry.updated_at).filter(
+                    SearchEntry.updated_at >= self._watermark - REFRESH_OVERLAP
+                ).all()
+                changed_ids = [item_id for item_id, updated_at in recent if self._indexed_at.get(item_id) != updated_at]
+                if not changed_ids:
+                    return
+                changed = session.query(SearchEntry).filter(SearchEntry.item_id.in_(changed_ids))
+            loaded = 0
+            for entry in changed.yield_per(1000):
+                self._add(entry)
+                if self._watermark is None or entry.updated_at > self._watermark:
+                    self._watermark = entry.updated_at
+                loaded += 1
+            if loaded > 100:
+                logger.info(f"Loaded {loaded} titles into the in-process search index")
+
+    def search(self, session, query, item_type=None, year=None, limit=10):
+        self.refresh(session)
+        query_grams = trigrams(query)
+        query_words = set(normalize(query).split())
+        if not query_words:
+            return []
+
+        with self._lock:
+            candidates = Counter()
+            for gram in query_grams:
+                candidates.update(self._by_trigram.get(gram, ()))
+            for word in query_words:
+                candidates.update(self._by_word.get(word, ()))
+
+            # Jaccard similarity >= MIN_SIMILARITY needs at least this many shared trigrams
+            min_shared = MIN_SIMILARITY * len(query_grams)
+            scored = []
+            for item_id, shared in candidates.items():
+                indexed = self._titles[item_id]
+                if item_type and indexed.type != item_type:
+                    continue
+                if year and (indexed.year is None or abs(indexed.year - year) > YEAR_TOLERANCE):
+                    continue
+                name_score = 0.0
+                if shared >= min_shared:
+                    name_score = max(similarity(query_grams, names) for names in indexed.names)
+                text_score = TEXT_MATCH_SCORE if query_words <= indexed.words else 0.0
+                if name_score < MIN_SIMILARITY and not text_score:
+                    continue
+                score = max(name_score, text_score)
+                if year and indexed.year == year:
+                    score += EXACT_YEAR_BONUS
+                scored.append((score, item_id))
+            scored.sort(key=lambda match: (-match[0], match[1]))
+
+        results = []
+        for score, item_id in scored:
+            if len(results) == limit:
+                break
+            indexed = self._titles.get(item_id)
+            if indexed is not None:
+                results.append((item_id, indexed, score))
+
+        live = {item_id for (item_id,) in session.query(SearchEntry.item_id).filter(
+            SearchEntry.item_id.in_([item_id for item_id, _, _ in results])
+        )} if results else set()
+        with self._lock:
+            for item_id, _, _ in results:
+                if item_id not in live:
+                    self._remove(item_id)
+        return [
+            {'imdb_id': indexed.imdb_id, 'title': indexed.title, 'year': indexed.year,
+             'type': indexed.type, 'score': round(score, 4)}
+            for item_id, indexed, score in results if item_id in live
+        ]
+
+class TitleSearch:
+    """Ranked, typo-tolerant title search over the battery.
+
+    On PostgreSQL with pg_trgm the query runs in the database against the
+    full-text and trigram indexes on search_index; elsewhere it uses an
+    InMemoryTitleIndex. Both score a title by its best trigram similarity
+    across the title and its aliases, or TEXT_MATCH_SCORE when every query
+    word appears in the title, aliases or overview.
+    """
+
+    def __init__(self):
+        self.memory_index = InMemoryTitleIndex()
+        self._trigram_support = {}
+
+    def _has_trigram_support(self, session):
+        bind = session.get_bind()
+        if bind.dialect.name != 'postgresql':
+            return False
+        key = bind.url.render_as_string(hide_password=True)
+        if key not in self._trigram_support:
+            self._trigram_support[key] = session.execute(
+                text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            ).first() is not None
+            if not self._trigram_support[key]:
+                logger.warning("pg_trgm is not installed, title search uses the in-process index")
+        return self._trigram_support[key]
+
+    def search(self, query, item_type=None, year=None, limit=10):
+        query = normalize(query)
+        if not query:
+            return []
+        limit = max(1, min(int(limit or 10), MAX_SEARCH_RESULTS))
+        with Session() as session:
+            if self._has_trigram_support(session):
+                return self._search_postgres(session, query, item_type, year, limit)
+            return self.memory_index.search(session, query, item_type, year, limit)
+
+    @staticmethod
+    def _search_postgres(session, query, item_type, year, limit):
+        filters = ''
+        params = {'q': query, 'limit': limit, 'min_similarity': MIN_SIMILARITY,
+                  'text_score': TEXT_MATCH_SCORE, 'year_bonus': EXACT_YEAR_BONUS}
+        if item_type:
+            filters += ' AND type = :type'
+            params['type'] = item_type
+        if year:
+            filters += ' AND year BETWEEN :year_from AND :year_to'
+            params.update(year=year, year_from=year - YEAR_TOLERANCE, year_to=year + YEAR_TOLERANCE)
+        year_bonus = 'CASE WHEN year = :year THEN :year_bonus ELSE 0 END' if year else '0'
+        # <% only uses the trigram index with its threshold set, for this transaction
+        session.execute(text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+                        {'threshold': str(MIN_SIMILARITY)})
+        rows = session.execute(text(f"""
+            SELECT imdb_id, title, year, type, score FROM (
+                SELECT imdb_id, title, year, type,
+                       GREATEST(
+                           similarity(lower(title), :q),
+                           word_similarity(:q, {SEARCH_NAMES_SQL}),
+                           CASE WHEN {SEARCH_VECTOR_SQL} @@ plainto_tsquery('simple', :q) THEN :text_score ELSE 0 END
+                       ) + {year_bonus} AS score
+                FROM search_index
+                WHERE (:q <% {SEARCH_NAMES_SQL} OR {SEARCH_VECTOR_SQL} @@ plainto_tsquery('simple', :q)){filters}
+            ) matches
+            ORDER BY score DESC, imdb_id
+            LIMIT :limit
+        """), params).all()
+        return [
+            {'imdb_id': row.imdb_id, 'title': row.title, 'year': row.year,
+             'type': row.type, 'score': round(float(row.score), 4)}
+            for row in rows
+        ]
+
+    @staticmethod
+    def backfill():
+        """Create search entries for items stored before the search index existed."""
+        indexed = 0
+        while True:
+            with Session() as session:
+                items = (session.query(Item)
+                         .outerjoin(SearchEntry, SearchEntry.item_id == Item.id)
+                         .filter(SearchEntry.id.is_(None))
+                         .order_by(Item.id)
+                         .limit(BACKFILL_BATCH_SIZE)
+                         .all())
+                if not items:
+                    break
+                rows = defaultdict(list)
+                for row in session.query(Metadata).filter(
+                    Metadata.item_id.in_([item.id for item in items]), Metadata.key.in_(SEARCH_METADATA_KEYS)
+                ):
+                    rows[row.item_id].append(row)
+                entries = []
+                for item in items:
+                    document = DatabaseManager.get_metadata_document(session, item.id)
+                    metadata = document[0] if document else DatabaseManager.decode_metadata_rows(rows[item.id])
+                    entries.append(DatabaseManager.search_entry_row(item, metadata))
+                DatabaseManager.index_for_search(session, entries)
+                session.commit()
+                indexed += len(items)
+        if indexed:
+            logger.info(f"Added {indexed} existing items to the search index")
+        return indexed
+
+title_search = TitleSearch()
+
+def start_search_backfill():
+    def run():
+        try:
+            TitleSearch.backfill()
+        except Exception as e:
+            logger.exception(f"Error building the search index: {str(e)}")
+        finally:
+            Session.remove()
+    thread = threading.Thread(target=run, name='search-backfill', daemon=True)
+    thread.start()
+    return thread
@@ -1,10 +1,48 @@
 import json
 from app.logger_config import logger
 import os
+import threading
+import time
 from datetime import timedelta
 
+# How often Settings() looks at the config file's mtime for outside edits
+RELOAD_CHECK_INTERVAL = 1.0  # seconds
+
 class Settings:
+    """Process-wide settings store.
+
+    Settings() always returns the same instance. The config file is parsed
+    once and re-read only when its mtime changes, and save() writes only
+    when a value actually differs from what is on disk.
+    """
+    _instance = None
+    _lock = threading.RLock()
+
+    def __new__(cls):
+        if cls._instance is not None:
+            return cls._instance
+        with cls._lock:
+            if cls._instance is None:
+                instance = super().__new__(cls)
+                instance._initialized = False
+                cls._instance = instance
+            return cls._instance
+
     def __init__(self):
+        if self._initialized:
+            self._reload_if_changed()
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self._set_defaults()
+            self._loaded_mtime = None
+            self._saved_config = None
+            self._checked_at = time.monotonic()
+            self.load()
+            self._initialized = True
+
+    def _set_defaults(self):
         self.config_file = '/user/config/settings.json'
         self.active_provider = 'none'
         self.providers = [
@@ -16,6 +54,42 @@ class Settings:
         self.staleness_threshold = 7  # in days
         self.max_entries = 1000  # default value, adjust as needed
         self.log_level = 'INFO'
+        self.http_pool_size = 10  # connections kept alive per host
+        self.http_max_retries = 3
+        self.http_backoff_factor = 0.5
+        self.trakt_sync_enabled = True
+        self.trakt_sync_interval = 15  # minutes between updates feed polls
+        self.stream_season_payloads = True
+        self.stale_while_revalidate = True
+        self.background_refresh_workers = 2
+        self.metadata_storage = 'rows'  # 'rows' (key/value) or 'document' (one JSON document per item)
+        self.grpc_max_workers = 10  # gRPC server thread pool
+        self.db_pool_size = None  # None sizes the pool from the worker thread counts
+        self.db_max_overflow = 10
+        self.db_pool_timeout = 30  # seconds to wait for a free connection
+        self.db_pool_recycle = 1800  # seconds before a connection is replaced
+        self.db_pool_pre_ping = True
+        self.db_connect_timeout = 10  # seconds
+        self.db_statement_timeout = 30000  # milliseconds, 0 disables
+        self.db_query_cache_size = 1200  # compiled statements cached per engine
+        self.sqlite_synchronous = 'NORMAL'  # OFF, NORMAL, FULL or EXTRA; NORMAL is safe under WAL
+        self.sqlite_mmap_size = 268435456  # bytes
+        self.sqlite_cache_size = -65536  # pages, or KiB when negative
+        self.stats_snapshot_ttl = 30  # seconds dashboard stats are reused
+        self.access_flush_interval = 30  # seconds between access count writes
+        self.eviction_interval = 300  # seconds between max_entries checks
+        self.result_cache_size = 10000  # formatted lookup results kept in memory, 0 disables
+        self.result_cache_ttl = 300  # seconds
+        self.shared_cache_backend = 'none'  # 'none', 'memory' or 'redis'
+        self.shared_cache_url = 'redis://localhost:6379/0'
+        self.shared_cache_prefix = 'cli_battery:'
+        self.shared_cache_max_ttl = 3600  # seconds, shorter when an item goes stale sooner
+        self.shared_cache_lock_timeout = 30  # seconds one replica may hold a lookup lock
+        self.negative_cache_ttl = 3600  # seconds before re-asking Trakt for an unknown ID, 0 disables
+        self.negative_cache_max_ttl = 86400  # cap on the doubling re-check interval
+        self.adaptive_ttl = True  # per-item freshness windows instead of one staleness_threshold
+        self.ttl_min = 21600  # seconds, shortest adaptive freshness window
+        self.ttl_max = 2592000  # seconds, longest adaptive freshness window
         self.Trakt = {
             'client_id': '',
             'client_secret': '',
@@ -23,10 +97,25 @@ class Settings:
             'refresh_token': '',
             'expires_at': None
         }
-        self.load()
 
-    def save(self):
-        config = {
+    def _config_mtime(self):
+        try:
+            return os.stat(self.config_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return
+        with self._lock:
+            self._checked_at = now
+            if self._config_mtime() != self._loaded_mtime:
+                logger.info(f"Settings file {self.config_file} changed, reloading")
+                self._load()
+
+    def _to_config(self):
+        return {
             'active_provider': self.active_provider,
             'providers': self.providers,
             'trakt_client_id': self.trakt_client_id,
@@ -34,13 +123,67 @@ class Settings:
             'staleness_threshold': self.staleness_threshold,
             'max_entries': self.max_entries,
             'log_level': self.log_level,
+            'http_pool_size': self.http_pool_size,
+            'http_max_retries': self.http_max_retries,
+            'http_backoff_factor': self.http_backoff_factor,
+            'trakt_sync_enabled': self.trakt_sync_enabled,
+            'trakt_sync_interval': self.trakt_sync_interval,
+            'stream_season_payloads': self.stream_season_payloads,
+            'stale_while_revalidate': self.stale_while_revalidate,
+            'background_refresh_workers': self.background_refresh_workers,
+            'metadata_storage': self.metadata_storage,
+            'grpc_max_workers': self.grpc_max_workers,
+            'db_pool_size': self.db_pool_size,
+            'db_max_overflow': self.db_max_overflow,
+            'db_pool_timeout': self.db_pool_timeout,
+            'db_pool_recycle': self.db_pool_recycle,
+            'db_pool_pre_ping': self.db_pool_pre_ping,
+            'db_connect_timeout': self.db_connect_timeout,
+            'db_statement_timeout': self.db_statement_timeout,
+            'db_query_cache_size': self.db_query_cache_size,
+            'sqlite_synchronous': self.sqlite_synchronous,
+            'sqlite_mmap_size': self.sqlite_mmap_size,
+            'sqlite_cache_size': self.sqlite_cache_size,
+            'stats_snapshot_ttl': self.stats_snapshot_ttl,
+            'access_flush_interval': self.access_flush_interval,
+            'eviction_interval': self.eviction_interval,
+            'result_cache_size': self.result_cache_size,
+            'result_cache_ttl': self.result_cache_ttl,
+            'shared_cache_backend': self.shared_cache_backend,
+            'shared_cache_url': self.shared_cache_url,
+            'shared_cache_prefix': self.shared_cache_prefix,
+            'shared_cache_max_ttl': self.shared_cache_max_ttl,
+            'shared_cache_lock_timeout': self.shared_cache_lock_timeout,
+            'negative_cache_ttl': self.negative_cache_ttl,
+            'negative_cache_max_ttl': self.negative_cache_max_ttl,
+            'adaptive_ttl': self.adaptive_ttl,
+            'ttl_min': self.ttl_min,
+            'ttl_max': self.ttl_max,
             'Trakt': self.Trakt
         }
-        with open(self.config_file, 'w') as f:
-            json.dump(config, f, indent=4)
+
+    def save(self):
+        with self._lock:
+            config = self._to_config()
+            if config == self._saved_config:
+                return False
+            os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
+            tmp_file = f"{self.config_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(config, f, indent=4)
+            os.replace(tmp_file, self.config_file)
+            # Deep copy via JSON, callers mutate the nested dicts in place
+            self._saved_config = json.loads(json.dumps(config))
+            self._loaded_mtime = self._config_mtime()
+            return True
 
     def load(self):
+        with self._lock:
+            self._load()
+
+    def _load(self):
         if os.path.exists(self.config_file):
+            mtime = self._config_mtime()
             with open(self.config_file, 'r') as f:
                 config = json.load(f)
             self.active_provider = config.get('active_provider', 'none')
@@ -50,11 +193,49 @@ class Settings:
             self.staleness_threshold = config.get('staleness_threshold', 7)
             self.max_entries = config.get('max_entries', 1000)
             self.log_level = config.get('log_level', 'INFO')
+            self.http_pool_size = config.get('http_pool_size', 10)
+            self.http_max_retries = config.get('http_max_retries', 3)
+            self.http_backoff_factor = config.get('http_backoff_factor', 0.5)
+            self.trakt_sync_enabled = config.get('trakt_sync_enabled', True)
+            self.trakt_sync_interval = config.get('trakt_sync_interval', 15)
+            self.stream_season_payloads = config.get('stream_season_payloads', True)
+            self.stale_while_revalidate = config.get('stale_while_revalidate', True)
+            self.background_refresh_workers = config.get('background_refresh_workers', 2)
+            self.metadata_storage = config.get('metadata_storage', 'rows')
+            self.grpc_max_workers = config.get('grpc_max_workers', 10)
+            self.db_pool_size = config.get('db_pool_size', None)
+            self.db_max_overflow = config.get('db_max_overflow', 10)
+            self.db_pool_timeout = config.get('db_pool_timeout', 30)
+            self.db_pool_recycle = config.get('db_pool_recycle', 1800)
+            self.db_pool_pre_ping = config.get('db_pool_pre_ping', True)
+            self.db_connect_timeout = config.get('db_connect_timeout', 10)
+            self.db_statement_timeout = config.get('db_statement_timeout', 30000)
+            self.db_query_cache_size = config.get('db_query_cache_size', 1200)
+            self.sqlite_synchronous = config.get('sqlite_synchronous', 'NORMAL')
+            self.sqlite_mmap_size = config.get('sqlite_mmap_size', 268435456)
+            self.sqlite_cache_size = config.get('sqlite_cache_size', -65536)
+            self.stats_snapshot_ttl = config.get('stats_snapshot_ttl', 30)
+            self.access_flush_interval = config.get('access_flush_interval', 30)
+            self.eviction_interval = config.get('eviction_interval', 300)
+            self.result_cache_size = config.get('result_cache_size', 10000)
+            self.result_cache_ttl = config.get('result_cache_ttl', 300)
+            self.shared_cache_backend = config.get('shared_cache_backend', 'none')
+            self.shared_cache_url = config.get('shared_cache_url', 'redis://localhost:6379/0')
+            self.shared_cache_prefix = config.get('shared_cache_prefix', 'cli_battery:')
+            self.shared_cache_max_ttl = config.get('shared_cache_max_ttl', 3600)
+            self.shared_cache_lock_timeout = config.get('shared_cache_lock_timeout', 30)
+            self.negative_cache_ttl = config.get('negative_cache_ttl', 3600)
+            self.negative_cache_max_ttl = config.get('negative_cache_max_ttl', 86400)
+            self.adaptive_ttl = config.get('adaptive_ttl', True)
+            self.ttl_min = config.get('ttl_min', 21600)
+            self.ttl_max = config.get('ttl_max', 2592000)
             self.Trakt = config.get('Trakt', self.Trakt)
+            self._loaded_mtime = mtime
+            self._saved_config = json.loads(json.dumps(self._to_config()))
             
             # Add debug logging
             logger.debug(f"Loaded settings: Trakt={self.Trakt}")
-        else:
+        elif self._loaded_mtime is None and self._saved_config is None:
             logger.warning(f"Config file not found: {self.config_file}")
 
     def get_all(self):
@@ -96,14 +277,9 @@ class Settings:
         logger.info(f"Updated Trakt settings: {self.Trakt}")
 
     def save_settings(self):
-        settings = self.get_all()
         try:
-            # Ensure the directory exists
-            os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-            
-            with open(self.config_file, 'w') as f:
-                json.dump(settings, f, indent=4)
-            logger.info("Settings saved successfully.")
+            if self.save():
+                logger.info("Settings saved successfully.")
         except IOError as e:
             logger.error(f"Error saving settings to file: {str(e)}")
         except Exception as e:
@@ -0,0 +1,343 @@
+import json
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from app.logger_config import logger
+from app.settings import Settings
+
+try:
+    import redis
+except ImportError:  # only needed for shared_cache_backend 'redis'
+    redis = None
+
+# How often a replica waiting on another one's fetch checks the lock
+LOCK_POLL_INTERVAL = 0.05  # seconds
+# Log a failing backend at most this often
+ERROR_LOG_INTERVAL = 60  # seconds
+
+def encode_value(value):
+    """JSON for a cached lookup result, keeping tuples, int keys and datetimes intact."""
+    return json.dumps(_tag(value), separators=(',', ':'))
+
+def decode_value(data):
+    return json.loads(data, object_hook=_untag)
+
+def _tag(value):
+    if isinstance(value, tuple):
+        return {'__tuple__': [_tag(v) for v in value]}
+    if isinstance(value, list):
+        return [_tag(v) for v in value]
+    if isinstance(value, dict):
+        if all(isinstance(k, str) for k in value) and not any(k.startswith('__') and k.endswith('__') for k in value):
+            return {k: _tag(v) for k, v in value.items()}
+        return {'__items__': [[_tag(k), _tag(v)] for k, v in value.items()]}
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    return value
+
+def _untag(obj):
+    if len(obj) == 1:
+        if '__tuple__' in obj:
+            return tuple(obj['__tuple__'])
+        if '__items__' in obj:
+            return {_hashable(k): v for k, v in obj['__items__']}
+        if '__datetime__' in obj:
+            return datetime.fromisoformat(obj['__datetime__'])
+        if '__date__' in obj:
+            return date.fromisoformat(obj['__date__'])
+    return obj
+
+def _hashable(key):
+    return tuple(key) if isinstance(key, list) else key
+
+class NullSharedCache:
+    """No shared tier: every lookup misses and every lock is granted."""
+    name = 'none'
+    enabled = False
+
+    def get(self, tag, field):
+        return None
+
+    def version(self, tag):
+        """Token that changes whenever tag is invalidated; pass it to set()."""
+        return None
+
+    def set(self, tag, field, value, ttl, version=None):
+        return False
+
+    def invalidate(self, tags):
+        pass
+
+    def acquire_lock(self, name, timeout):
+        return True
+
+    def release_lock(self, name, token):
+        pass
+
+    def is_locked(self, name):
+        return False
+
+    def subscribe(self, callback):
+        pass
+
+    def get_stats(self):
+        return {'backend': self.name}
+
+class MemorySharedCache(NullSharedCache):
+    """Process-local stand-in with the same behaviour as the Redis backend.
+
+    Useful for a single replica and for exercising the shared tier without
+    a Redis server. Values go through the same serialization.
+    """
+    name = 'memory'
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # (tag, field) -> (expires_at, data)
+        self._locks = {}  # name -> (expires_at, token)
+        self._versions = {}  # tag -> token replaced on every invalidation
+        self._subscribers = []
+
+    def get(self, tag, field):
+        with self._lock:
+            entry = self._entries.get((tag, field))
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            return decode_value(entry[1])
+
+    def version(self, tag):
+        with self._lock:
+            return self._versions.get(tag)
+
+    def set(self, tag, field, value, ttl, version=None):
+        with self._lock:
+            if self._versions.get(tag) != version:
+                return False
+            self._entries[(tag, field)] = (time.monotonic() + ttl, encode_value(value))
+        return True
+
+    def invalidate(self, tags):
+        tags = set(tags)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in tags]:
+                del self._entries[key]
+            for tag in tags:
+                self._versions[tag] = uuid.uuid4().hex
+        for callback in self._subscribers:
+            callback(list(tags))
+
+    def acquire_lock(self, name, timeout):
+        now = time.monotonic()
+        with self._lock:
+            held = self._locks.get(name)
+            if held is not None and held[0] > now:
+                return None
+            token = uuid.uuid4().hex
+            self._locks[name] = (now + timeout, token)
+            return token
+
+    def release_lock(self, name, token):
+        with self._lock:
+            held = self._locks.get(name)
+            if held is not None and held[1] == token:
+                del self._locks[name]
+
+    def is_locked(self, name):
+        with self._lock:
+            held = self._locks.get(name)
+            return held is not None and held[0] > time.monotonic()
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def get_stats(self):
+        with self._lock:
+            return {'backend': self.name, 'entries': len(self._entries), 'locks': len(self._locks)}
+
+class RedisSharedCache(NullSharedCache):
+    """Shared tier on any Redis-protocol server.
+
+    Each tag (IMDb or TMDB ID) is one hash, with a field per lookup
+    operation holding {expires, value}. Invalidating a tag deletes the
+    hash, replaces the tag's version key and publishes the tag, so other
+    replicas drop their local copies. Writes check the version key in a
+    WATCH/MULTI, so a load that overlapped an invalidation on any replica
+    is not stored.
+    Locks are SET NX PX keys, released with a WATCH/MULTI compare-and-delete
+    so servers without Lua scripting work too. Redis errors are logged and
+    treated as misses.
+    """
+    name = 'redis'
+    enabled = True
+
+    def __init__(self, url, prefix, max_ttl):
+        self.client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+        self.prefix = prefix
+        self.max_ttl = max_ttl
+        self.channel = f'{prefix}invalidate'
+        self.replica_id = uuid.uuid4().hex
+        self._subscribers = []
+        self._listener = None
+        self._last_error_log = 0
+        self.errors = 0
+
+    def _key(self, tag):
+        return f'{self.prefix}item:{tag}'
+
+    def _version_key(self, tag):
+        return f'{self.prefix}version:{tag}'
+
+    def _failed(self, operation, error):
+        self.errors += 1
+        now = time.monotonic()
+        if now - self._last_error_log >= ERROR_LOG_INTERVAL:
+            self._last_error_log = now
+            logger.warning(f"Shared cache {operation} failed, continuing without it: {str(error)}")
+
+    def get(self, tag, field):
+        try:
+            data = self.client.hget(self._key(tag), field)
+        except redis.RedisError as e:
+            self._failed('read', e)
+            return None
+        if data is None:
+            return None
+        entry = decode_value(data)
+        if entry['expires'] <= time.time():
+            return None
+        return entry['value']
+
+    def version(self, tag):
+        try:
+            return self.client.get(self._version_key(tag))
+        except redis.RedisError as e:
+            self._failed('read', e)
+            return None
+
+    def set(self, tag, field, value, ttl, version=None):
+        data = encode_value({'expires': time.time() + ttl, 'value': value})
+        version_key = self._version_key(tag)
+        try:
+            with self.client.pipeline() as pipe:
+                pipe.watch(version_key)
+                if pipe.get(version_key) != version:
+                    # Invalidated since the load started
+                    pipe.unwatch()
+                    return False
+                pipe.multi()
+                pipe.hset(self._key(tag), field, data)
+                pipe.expire(self._key(tag), int(self.max_ttl))
+                pipe.execute()
+            return True
+        except redis.WatchError:
+            return False
+        except redis.RedisError as e:
+            self._failed('write', e)
+            return False
+
+    def invalidate(self, tags):
+        tags = [tag for tag in tags if tag]
+        if not tags:
+            return
+        try:
+            pipe = self.client.pipeline()
+            pipe.delete(*[self._key(tag) for tag in tags])
+            for tag in tags:
+                # Outlives any load that could have read the old version
+                pipe.set(self._version_key(tag), uuid.uuid4().hex, ex=int(self.max_ttl))
+            pipe.publish(self.channel, json.dumps({'replica': self.replica_id, 'tags': tags}))
+            pipe.execute()
+        except redis.RedisError as e:
+            self._failed('invalidation', e)
+
+    def acquire_lock(self, name, timeout):
+        token = uuid.uuid4().hex
+        try:
+            if self.client.set(f'{self.prefix}lock:{name}', token, nx=True, px=int(timeout * 1000)):
+                return token
+            return None
+        except redis.RedisError as e:
+            self._failed('lock', e)
+            # Without the shared tier every replica fetches for itself
+            return True
+
+    def release_lock(self, name, token):
+        if token is True:
+            return
+        key = f'{self.prefix}lock:{name}'
+        try:
+            with self.client.pipeline() as pipe:
+                pipe.watch(key)
+                # Only delete the lock if it is still ours and not one taken over after it expired
+                if pipe.get(key) == token.encode():
+                    pipe.multi()
+                    pipe.delete(key)
+                    pipe.execute()
+                else:
+                    pipe.unwatch()
+        except redis.WatchError:
+            pass
+        except redis.RedisError as e:
+            self._failed('unlock', e)
+
+    def is_locked(self, name):
+        try:
+            return bool(self.client.exists(f'{self.prefix}lock:{name}'))
+        except redis.RedisError as e:
+            self._failed('lock check', e)
+            return False
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+        if self._listener is None:
+            self._listener = threading.Thread(target=self._listen, name='shared-cache-invalidations', daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    payload = json.loads(message['data'])
+                    if payload.get('replica') == self.replica_id:
+                        continue
+                    for callback in self._subscribers:
+                        callback(payload['tags'])
+            except Exception as e:
+                self._failed('subscription', e)
+                time.sleep(1)
+
+    def get_stats(self):
+        return {'backend': self.name, 'replica_id': self.replica_id, 'errors': self.errors}
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def _build_shared_cache():
+    settings = Settings()
+    backend = settings.shared_cache_backend
+    if backend == 'memory':
+        return MemorySharedCache()
+    if backend == 'redis':
+        if redis is None:
+            logger.error("shared_cache_backend is 'redis' but the redis package is not installed; shared cache disabled")
+            return NullSharedCache()
+        logger.info(f"Using Redis shared cache at {settings.shared_cache_url}")
+        return RedisSharedCache(settings.shared_cache_url, settings.shared_cache_prefix, settings.shared_cache_max_ttl)
+    if backend not in (None, '', 'none'):
+        logger.error(f"Unknown shared_cache_backend {backend!r}; shared cache disabled")
+    return NullSharedCache()
+
+def get_shared_cache():
+    """Return the process-wide shared cache tier, built from settings on first use."""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = _build_shared_cache()
+    return _shared_cache
@@ -0,0 +1,66 @@
+import threading
+from functools import wraps
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers that arrive while
+    it is running wait for it and share its result (or its exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if leader:
+            try:
+                call.result = fn(*args, **kwargs)
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return copy_result(call.result)
+
+def copy_result(result):
+    # Every caller gets its own top-level containers, so one caller adding
+    # keys (e.g. gRPC attaching seasons) can't leak into another's response.
+    if isinstance(result, tuple):
+        return tuple(copy_result(value) for value in result)
+    if isinstance(result, dict):
+        return dict(result)
+    if isinstance(result, list):
+        return list(result)
+    return result
+
+lookups = SingleFlight()
+
+def single_flight(operation):
+    """Coalesce concurrent calls of the decorated lookup on (operation, args)."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (operation,) + args + tuple(sorted(kwargs.items()))
+            return lookups.do(key, func, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,44 @@
+import threading
+import time
+from app.logger_config import logger
+from app.settings import Settings
+
+class StatsSnapshot:
+    """Caches the result of an expensive stats query for a few seconds.
+
+    Pages read the last snapshot; only the first caller after it expires
+    runs compute() again, while the others keep getting the previous
+    value. A ttl of 0 recomputes on every call.
+    """
+
+    def __init__(self, compute):
+        self.compute = compute
+        self._lock = threading.Lock()
+        self._value = None
+        self._taken_at = None
+
+    def _fresh(self, now):
+        ttl = Settings().stats_snapshot_ttl
+        return self._taken_at is not None and now - self._taken_at < ttl
+
+    def get(self):
+        now = time.monotonic()
+        if self._fresh(now):
+            return self._value
+        # Someone else is already refreshing: serve what we have
+        if self._value is not None and not self._lock.acquire(blocking=False):
+            return self._value
+        if self._value is None:
+            self._lock.acquire()
+        try:
+            if not self._fresh(time.monotonic()):
+                started = time.monotonic()
+                self._value = self.compute()
+                self._taken_at = time.monotonic()
+                logger.debug(f"Stats snapshot refreshed in {self._taken_at - started:.3f}s")
+            return self._value
+        finally:
+            self._lock.release()
+
+    def invalidate(self):
+        self._taken_at = None
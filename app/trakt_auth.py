@@ -2,14 +2,19 @@ from app.logger_config import logger
 from datetime import datetime, timedelta
 import iso8601
 from datetime import timezone
-import requests
 from urllib.parse import urlencode
 import json
 from app.settings import Settings
+from app.http_client import get_session
 import os
-import traceback
-TRAKT_API_URL = "https://api.trakt.tv"
+import threading
+import time
+import requests
+# Point TRAKT_API_URL at trakt_emulator.py for offline benchmarking
+TRAKT_API_URL = os.environ.get('TRAKT_API_URL', "https://api.trakt.tv").rstrip('/')
 REQUEST_TIMEOUT = 10  # seconds
+TOKEN_REFRESH_MARGIN = 24 * 60 * 60  # refresh this many seconds ahead of expiry
+TOKEN_CHECK_INTERVAL = 5 * 60  # seconds between refresher checks
 
 class TraktAuth:
     def __init__(self):
@@ -19,12 +24,18 @@ class TraktAuth:
         self.client_secret = self.settings.Trakt.get('client_secret')
         self.redirect_uri = "http://192.168.1.51:5001/trakt_callback"
         self.pytrakt_file = '/user/config/.pytrakt.json'  # Add this line
+        self._refresh_lock = threading.Lock()
+        self._headers = None
+        self._valid_until = 0.0
         self.load_auth()
         
         # Add debug logging
         logger.debug(f"TraktAuth initialized: access_token={bool(self.access_token)}, refresh_token={bool(self.refresh_token)}, expires_at={self.expires_at}")
 
     def load_auth(self):
+        self.settings = Settings()
+        self.client_id = self.settings.Trakt.get('client_id')
+        self.client_secret = self.settings.Trakt.get('client_secret')
         self.access_token = self.settings.Trakt.get('access_token')
         self.refresh_token = self.settings.Trakt.get('refresh_token')
         self.expires_at = self.settings.Trakt.get('expires_at')
@@ -33,6 +44,7 @@ class TraktAuth:
         if not self.access_token or not self.refresh_token:
             self.load_from_pytrakt()
 
+        self._build_headers()
         logger.info("Trakt authentication loaded.")
         
         # Add debug logging
@@ -50,41 +62,67 @@ class TraktAuth:
             self.settings.Trakt['access_token'] = self.access_token
             self.settings.Trakt['refresh_token'] = self.refresh_token
             self.settings.Trakt['expires_at'] = self.expires_at
-            self.settings.save_settings()
+            self.settings.save()
             
             logger.info("Loaded authentication data from .pytrakt.json")
             logger.debug(f"Loaded auth: access_token={bool(self.access_token)}, refresh_token={bool(self.refresh_token)}, expires_at={self.expires_at}")
         else:
             logger.warning(f".pytrakt.json file not found at {self.pytrakt_file}")
 
+    def _build_headers(self):
+        # Everything the hot path needs is worked out here, once per token
+        expires_at = self._parse_expiry(self.expires_at)
+        if not self.access_token or expires_at is None:
+            self._headers = None
+            self._valid_until = 0.0
+            return
+        self._headers = {
+            'Content-Type': 'application/json',
+            'trakt-api-version': '2',
+            'trakt-api-key': self.client_id,
+            'Authorization': f'Bearer {self.access_token}'
+        }
+        self._valid_until = expires_at.timestamp()
+
+    @staticmethod
+    def _parse_expiry(expires_at):
+        if not expires_at:
+            return None
+        if isinstance(expires_at, str):
+            return iso8601.parse_date(expires_at)
+        if isinstance(expires_at, (int, float)):
+            return datetime.fromtimestamp(expires_at, tz=timezone.utc)
+        logger.error(f"Unexpected type for expires_at: {type(expires_at)}")
+        return None
+
     def save_token_data(self, token_data):
-        self.settings.Trakt['access_token'] = token_data['access_token']
-        self.settings.Trakt['refresh_token'] = token_data['refresh_token']
-        self.settings.Trakt['expires_at'] = (datetime.now() + timedelta(seconds=token_data['expires_in'])).isoformat()
-        self.settings.save_settings()
+        settings = Settings()
+        settings.Trakt['access_token'] = token_data['access_token']
+        settings.Trakt['refresh_token'] = token_data['refresh_token']
+        settings.Trakt['expires_at'] = (datetime.now(timezone.utc) + timedelta(seconds=token_data['expires_in'])).isoformat()
+        settings.save()
         self.load_auth()  # Reload the auth data after saving
         self.save_trakt_credentials()  # Also update the .pytrakt.json file
         logger.info("Trakt token data saved and reloaded.")
 
     def is_authenticated(self):
-        logger.info(f"is_authenticated called from: {traceback.extract_stack()[-2][2]}")
+        return self._headers is not None and time.time() < self._valid_until
 
-        if not self.access_token or not self.expires_at:
-            logger.warning(f"Missing authentication data: access_token={bool(self.access_token)}, expires_at={self.expires_at}")
-            return False
-        
-        if isinstance(self.expires_at, str):
-            expires_at = iso8601.parse_date(self.expires_at)
-        elif isinstance(self.expires_at, (int, float)):
-            expires_at = datetime.fromtimestamp(self.expires_at, tz=timezone.utc)
-        else:
-            logger.error(f"Unexpected type for expires_at: {type(self.expires_at)}")
-            return False
-        
-        now = datetime.now(timezone.utc)
-        is_valid = now < expires_at
-        logger.info(f"Authentication status: {is_valid}. Current time: {now}, Expires at: {expires_at}")
-        return is_valid
+    def get_headers(self):
+        """Headers for a Trakt API call, or None when no valid token can be had.
+
+        The refresher thread renews the token ahead of expiry, so this is
+        normally just a comparison and a cached dict. Only if the token has
+        already expired does the caller refresh it inline.
+        """
+        if time.time() < self._valid_until:
+            return self._headers
+        with self._refresh_lock:
+            # Another caller may have refreshed while we waited
+            if time.time() < self._valid_until or self.refresh_access_token():
+                return self._headers
+        logger.error("Failed to authenticate with Trakt.")
+        return None
 
     def refresh_access_token(self):
         if not self.refresh_token:
@@ -97,7 +135,11 @@ class TraktAuth:
             'client_secret': self.client_secret,
             'grant_type': 'refresh_token'
         }
-        response = requests.post(f"{self.base_url}/oauth/token", json=data)
+        try:
+            response = get_session().post(f"{self.base_url}/oauth/token", json=data, timeout=REQUEST_TIMEOUT)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to refresh access token: {str(e)}")
+            return False
         if response.status_code == 200:
             token_data = response.json()
             self.save_token_data(token_data)
@@ -111,7 +153,7 @@ class TraktAuth:
         data = {
             "client_id": self.client_id
         }
-        response = requests.post(url, json=data, timeout=REQUEST_TIMEOUT)
+        response = get_session().post(url, json=data, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         return response.json()
 
@@ -122,7 +164,7 @@ class TraktAuth:
             "client_id": self.client_id,
             "client_secret": self.client_secret
         }
-        return requests.post(url, json=data, timeout=REQUEST_TIMEOUT)
+        return get_session().post(url, json=data, timeout=REQUEST_TIMEOUT)
 
     def get_authorization_url(self):
         params = {
@@ -142,7 +184,7 @@ class TraktAuth:
             'redirect_uri': self.redirect_uri,
             'grant_type': 'authorization_code'
         }
-        response = requests.post(f"{self.base_url}/oauth/token", json=data)
+        response = get_session().post(f"{self.base_url}/oauth/token", json=data, timeout=REQUEST_TIMEOUT)
         if response.status_code == 200:
             token_data = response.json()
             self.save_token_data(token_data)
@@ -162,3 +204,25 @@ class TraktAuth:
         with open(self.pytrakt_file, 'w') as f:
             json.dump(credentials, f)
         logger.info(f"Trakt credentials saved to {self.pytrakt_file}")
+
+    def run_refresher(self):
+        while True:
+            try:
+                if self.refresh_token and self._valid_until - time.time() < TOKEN_REFRESH_MARGIN:
+                    logger.info("Trakt access token is close to expiry, refreshing it")
+                    with self._refresh_lock:
+                        self.refresh_access_token()
+            except Exception as e:
+                logger.exception(f"Error refreshing Trakt access token: {str(e)}")
+            time.sleep(TOKEN_CHECK_INTERVAL)
+
+trakt_auth = TraktAuth()
+
+def reload_trakt_auth():
+    """Pick up tokens saved outside the shared TraktAuth instance."""
+    trakt_auth.load_auth()
+
+def start_token_refresher():
+    thread = threading.Thread(target=trakt_auth.run_refresher, name='trakt-token-refresher', daemon=True)
+    thread.start()
+    return thread
@@ -17,19 +17,29 @@ from datetime import datetime, timedelta
 import iso8601
 from datetime import timezone, datetime
 from collections import defaultdict
-from app.trakt_auth import TraktAuth
-import traceback
+from app.trakt_auth import trakt_auth, TRAKT_API_URL
+from app.http_client import get_session
+from app.trakt_scheduler import trakt_scheduler
+from app.circuit_breaker import trakt_breaker
+from app.fetch_plan import FetchPlan, SHOW, SHOW_SEASONS, MOVIE
+from app.id_type_index import id_type_index
+from app.negative_cache import negative_cache
 import iso8601
 
-TRAKT_API_URL = "https://api.trakt.tv"
-CACHE_FILE = 'db_content/trakt_last_activity.pkl'
+try:
+    import ijson
+except ImportError:  # fall back to parsing whole season payloads in memory
+    ijson = None
+
+CACHE_FILE = '/user/db_content/trakt_last_activity.pkl'
 REQUEST_TIMEOUT = 10  # seconds
-trakt_auth = TraktAuth()
+UPDATES_PAGE_LIMIT = 100
+RATE_LIMIT_RETRIES = 2  # extra attempts after a 429, each waiting out Retry-After
 
 class TraktMetadata:
     def __init__(self):
         self.settings = Settings()
-        self.base_url = "https://api.trakt.tv"
+        self.base_url = TRAKT_API_URL
         self.client_id = self.settings.Trakt.get('client_id')
         self.client_secret = self.settings.Trakt.get('client_secret')
         self.redirect_uri = "http://192.168.1.51:5001/trakt_callback"
@@ -37,30 +47,46 @@ class TraktMetadata:
         self.refresh_token = self.settings.Trakt.get('refresh_token')
         self.expires_at = self.settings.Trakt.get('expires_at')
 
-    def _make_request(self, url):
-        logger.info(f"_make_request called from: {traceback.extract_stack()[-2][2]}")
+    def _make_request(self, url, stream=False, lookup=None):
+        """GET url from Trakt, or None if it failed.
 
-        if not trakt_auth.is_authenticated():
-            if not trakt_auth.refresh_access_token():
-                logger.error("Failed to authenticate with Trakt.")
-                return None
-            else:
-                # Update instance variables with new tokens
-                self.access_token = self.settings.Trakt.get('access_token')
-                self.refresh_token = self.settings.Trakt.get('refresh_token')
-                self.expires_at = self.settings.Trakt.get('expires_at')
-
-        headers = {
-            'Content-Type': 'application/json',
-            'trakt-api-version': '2',
-            'trakt-api-key': self.client_id,
-            'Authorization': f'Bearer {self.access_token}'
-        }
+        lookup is the (kind, id) the request is about; it is skipped while
+        negative_cache holds a recent "not found" for it, and a 404 is
+        recorded there.
+        """
+        if lookup and negative_cache.is_missing(*lookup):
+            return None
+        headers = trakt_auth.get_headers()
+        if headers is None:
+            return None
+
+        if not trakt_breaker.allow_request():
+            logger.warning(f"Trakt circuit breaker is open, not requesting {url}")
+            return None
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            for attempt in range(RATE_LIMIT_RETRIES + 1):
+                trakt_scheduler.acquire()
+                response = get_session().get(url, headers=headers, timeout=REQUEST_TIMEOUT, stream=stream)
+                trakt_scheduler.observe(response)
+                if response.status_code != 429 or attempt == RATE_LIMIT_RETRIES:
+                    break
+                response.close()
+                logger.warning(f"Trakt returned 429 for {url}, retrying after rate limit pause")
             response.raise_for_status()
+            trakt_breaker.record_success()
             return response
         except requests.exceptions.RequestException as e:
+            # Only outages count against Trakt; a 404 or 401 means it answered
+            status_code = e.response.status_code if getattr(e, 'response', None) is not None else None
+            if status_code is None or status_code >= 500:
+                trakt_breaker.record_failure()
+            else:
+                trakt_breaker.record_success()
+            if status_code == 404:
+                if lookup:
+                    negative_cache.record_missing(*lookup)
+                logger.info(f"Trakt returned 404 for {url}")
+                return None
             logger.error(f"Error making request to Trakt API: {e}")
             logger.error(f"URL: {url}")
             logger.error(f"Headers: {headers}")
@@ -78,7 +104,9 @@ class TraktMetadata:
         logger.debug(f"Fetching items from Trakt URL: {full_url}")
 
         try:
-            response = requests.get(full_url, headers=self.headers, timeout=REQUEST_TIMEOUT)
+            trakt_scheduler.acquire()
+            response = get_session().get(full_url, headers=self.headers, timeout=REQUEST_TIMEOUT)
+            trakt_scheduler.observe(response)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -88,14 +116,23 @@ class TraktMetadata:
             return []
 
     def get_metadata(self, imdb_id: str) -> Dict[str, Any]:
-        show_data = self._get_show_data(imdb_id)
+        # Go straight to the right endpoint when we know the type, otherwise
+        # probe both at once rather than one after the other.
+        known_type = id_type_index.lookup(imdb_id)
+        if known_type == 'show':
+            show_data, movie_data = self._get_show_data(imdb_id), None
+        elif known_type == 'movie':
+            show_data, movie_data = None, self._get_movie_data(imdb_id)
+        else:
+            results = FetchPlan(self).need(SHOW, imdb_id).need(MOVIE, imdb_id).execute()
+            show_data, movie_data = results[(SHOW, imdb_id)], results[(MOVIE, imdb_id)]
+
         if show_data:
             return {
                 'type': 'show',
                 'metadata': show_data
             }
 
-        movie_data = self._get_movie_data(imdb_id)
         if movie_data:
             movie_metadata = {
                 'type': 'movie',
@@ -109,26 +146,46 @@ class TraktMetadata:
 
         return None
 
+    def _is_other_type(self, imdb_id, expected_type):
+        known_type = id_type_index.lookup(imdb_id)
+        if known_type and known_type != expected_type:
+            logger.info(f"Skipping Trakt {expected_type} lookup for {imdb_id}, it is a known {known_type}")
+            return True
+        return False
+
     def _get_show_data(self, imdb_id):
+        if self._is_other_type(imdb_id, 'show'):
+            return None
         url = f"{self.base_url}/shows/{imdb_id}?extended=full"
-        response = self._make_request(url)
+        response = self._make_request(url, lookup=('show', imdb_id))
         if response and response.status_code == 200:
-            return response.json()
+            show_data = response.json()
+            negative_cache.record_found('show', imdb_id)
+            id_type_index.record(show_data.get('ids', {}).get('imdb') or imdb_id, 'show')
+            return show_data
         return None
 
     def _get_movie_data(self, imdb_id):
+        if self._is_other_type(imdb_id, 'movie'):
+            return None
         url = f"{self.base_url}/movies/{imdb_id}?extended=full"
-        response = self._make_request(url)
+        response = self._make_request(url, lookup=('movie', imdb_id))
         if response and response.status_code == 200:
-            return response.json()
+            movie_data = response.json()
+            negative_cache.record_found('movie', imdb_id)
+            id_type_index.record(movie_data.get('ids', {}).get('imdb') or imdb_id, 'movie')
+            return movie_data
         return None
 
     def get_show_seasons_and_episodes(self, imdb_id):
+        if self._is_other_type(imdb_id, 'show'):
+            return None, None
         url = f"{self.base_url}/shows/{imdb_id}/seasons?extended=full,episodes"
-        response = self._make_request(url)
+        response = self._make_request(url, lookup=('show', imdb_id))
         if response and response.status_code == 200:
             seasons_data = response.json()
             processed_seasons = {}
+            seen_types = {imdb_id: 'show'}
             for season in seasons_data:
                 if season['number'] is not None and season['number'] > 0:
                     season_number = season['number']
@@ -138,23 +195,83 @@ class TraktMetadata:
                     }
                     for episode in season.get('episodes', []):
                         episode_number = episode['number']
-                        processed_seasons[season_number]['episodes'][episode_number] = {
-                            'title': episode.get('title', ''),
-                            'overview': episode.get('overview', ''),
-                            'runtime': episode.get('runtime', 0),
-                            'first_aired': episode.get('first_aired'),
-                            'imdb_id': episode['ids'].get('imdb')
-                        }
+                        processed_seasons[season_number]['episodes'][episode_number] = self._format_episode(episode)
+                        if episode['ids'].get('imdb'):
+                            seen_types[episode['ids']['imdb']] = 'episode'
+            id_type_index.record_many(seen_types)
             return processed_seasons, 'trakt'
         return None, None
 
-    def get_show_metadata(self, imdb_id):
-        url = f"{self.base_url}/shows/{imdb_id}?extended=full"
-        response = self._make_request(url)
-        if response and response.status_code == 200:
-            show_data = response.json()
+    @staticmethod
+    def _format_episode(episode):
+        return {
+            'title': episode.get('title', ''),
+            'overview': episode.get('overview', ''),
+            'runtime': episode.get('runtime', 0),
+            'first_aired': episode.get('first_aired'),
+            'imdb_id': episode['ids'].get('imdb')
+        }
+
+    def iter_show_seasons_and_episodes(self, imdb_id):
+        """Stream /seasons?extended=full,episodes without loading the whole document.
+
+        Yields ('episode', season_number, episode_number, episode_info) for
+        every episode and ('season', season_number, episode_count) when each
+        season closes, skipping specials like get_show_seasons_and_episodes.
+        Memory stays at one episode no matter how long the show runs.
+        """
+        if ijson is None:
             seasons_data, _ = self.get_show_seasons_and_episodes(imdb_id)
-            show_data['seasons'] = seasons_data
+            for season_number, season_info in (seasons_data or {}).items():
+                for episode_number, episode_info in season_info['episodes'].items():
+                    yield 'episode', season_number, episode_number, episode_info
+                yield 'season', season_number, season_info['episode_count']
+            return
+
+        if self._is_other_type(imdb_id, 'show'):
+            return
+        url = f"{self.base_url}/shows/{imdb_id}/seasons?extended=full,episodes"
+        response = self._make_request(url, stream=True, lookup=('show', imdb_id))
+        if not (response and response.status_code == 200):
+            return
+
+        with response:
+            response.raw.decode_content = True
+            builder = None
+            season = {}
+            seen_types = {imdb_id: 'show'}
+            for prefix, event, value in ijson.parse(response.raw, use_float=True):
+                if builder is not None:
+                    builder.event(event, value)
+                    if prefix == 'item.episodes.item' and event == 'end_map':
+                        episode, builder = builder.value, None
+                        season_number = episode.get('season', season.get('number'))
+                        if season_number is None or season_number <= 0:
+                            continue
+                        episode_info = self._format_episode(episode)
+                        if episode_info['imdb_id']:
+                            seen_types[episode_info['imdb_id']] = 'episode'
+                        yield 'episode', season_number, episode['number'], episode_info
+                elif prefix == 'item.episodes.item' and event == 'start_map':
+                    builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+                elif prefix == 'item' and event == 'start_map':
+                    season = {}
+                elif prefix in ('item.number', 'item.episode_count'):
+                    season[prefix.split('.', 1)[1]] = value
+                elif prefix == 'item' and event == 'end_map':
+                    id_type_index.record_many(seen_types)
+                    seen_types = {}
+                    if season.get('number') is not None and season['number'] > 0:
+                        yield 'season', season['number'], season.get('episode_count', 0)
+
+    def get_show_metadata(self, imdb_id):
+        if self._is_other_type(imdb_id, 'show'):
+            return None
+        results = FetchPlan(self).need(SHOW, imdb_id).need(SHOW_SEASONS, imdb_id).execute()
+        show_data = results[(SHOW, imdb_id)]
+        if show_data:
+            show_data['seasons'] = results[(SHOW_SEASONS, imdb_id)]
             return show_data
         return None
 
@@ -165,13 +282,18 @@ class TraktMetadata:
 
         # If not cached, fetch the show data
         url = f"{self.base_url}/search/imdb/{episode_imdb_id}?type=episode"
-        response = self._make_request(url)
+        response = self._make_request(url, lookup=('episode', episode_imdb_id))
         if response and response.status_code == 200:
             data = response.json()
-            if data:
+            if not data:
+                # Search answers an unknown ID with an empty list rather than a 404
+                negative_cache.record_missing('episode', episode_imdb_id)
+            else:
+                negative_cache.record_found('episode', episode_imdb_id)
                 episode_data = data[0]['episode']
                 show_data = data[0]['show']
                 show_imdb_id = show_data['ids']['imdb']
+                id_type_index.record_many({episode_imdb_id: 'episode', show_imdb_id: 'show'})
 
                 # Fetch all episodes for this show
                 _, all_episodes = self.get_show_seasons_and_episodes(show_imdb_id)
@@ -193,61 +315,51 @@ class TraktMetadata:
 
 
     def get_show_episodes(self, imdb_id):
-        url = f"{self.base_url}/shows/{imdb_id}/seasons?extended=full,episodes"
-        response = self._make_request(url)
-        if response and response.status_code == 200:
-            seasons_data = response.json()
-            processed_episodes = []
-            for season in seasons_data:
-                if season['number'] is not None and season['number'] > 0:
-                    for episode in season.get('episodes', []):
-                        first_aired = None
-                        if episode.get('first_aired'):
-                            try:
-                                first_aired = iso8601.parse_date(episode['first_aired'])
-                            except iso8601.ParseError:
-                                logger.warning(
-                                    f"Could not parse date: {episode['first_aired']} for episode {episode['number']} "
-                                    f"of season {season['number']} in {imdb_id}"
-                                )
-
-                        processed_episodes.append({
-                            'season': season['number'],
-                            'episode': episode['number'],
-                            'title': episode.get('title', ''),
-                            'overview': episode.get('overview', ''),
-                            'runtime': episode.get('runtime', 0),
-                            'first_aired': first_aired,
-                            'imdb_id': episode['ids'].get('imdb')  # Include the IMDb ID
-                        })
-            return processed_episodes
-        return None
+        processed_episodes = []
+        for event in self.iter_show_seasons_and_episodes(imdb_id):
+            if event[0] != 'episode':
+                continue
+            _, season_number, episode_number, episode_info = event
+            first_aired = None
+            if episode_info['first_aired']:
+                try:
+                    first_aired = iso8601.parse_date(episode_info['first_aired'])
+                except iso8601.ParseError:
+                    logger.warning(
+                        f"Could not parse date: {episode_info['first_aired']} for episode {episode_number} "
+                        f"of season {season_number} in {imdb_id}"
+                    )
+
+            processed_episodes.append({
+                'season': season_number,
+                'episode': episode_number,
+                'title': episode_info['title'],
+                'overview': episode_info['overview'],
+                'runtime': episode_info['runtime'],
+                'first_aired': first_aired,
+                'imdb_id': episode_info['imdb_id']  # Include the IMDb ID
+            })
+        return processed_episodes or None
 
 
     def refresh_metadata(self, imdb_id: str) -> Dict[str, Any]:
         return self.get_metadata(imdb_id)
 
     def get_movie_metadata(self, imdb_id):
-        headers = {
-            'Content-Type': 'application/json',
-            'trakt-api-version': '2',
-            'trakt-api-key': self.client_id,
-            'Authorization': f'Bearer {self.settings.Trakt["access_token"]}'
-        }
-        response = requests.get(f"{self.base_url}/movies/{imdb_id}?extended=full", headers=headers)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            logger.error(f"Failed to fetch movie metadata from Trakt: {response.text}")
-            return None
+        movie_data = self._get_movie_data(imdb_id)
+        if movie_data:
+            return movie_data
+        logger.error(f"Failed to fetch movie metadata from Trakt for IMDB ID: {imdb_id}")
+        return None
 
     def get_poster(self, imdb_id: str) -> str:
         return "Posters not available through Trakt API"
 
     def get_release_dates(self, imdb_id):
+        if self._is_other_type(imdb_id, 'movie'):
+            return None
         url = f"{self.base_url}/movies/{imdb_id}/releases"
-        response = self._make_request(url)
+        response = self._make_request(url, lookup=('movie', imdb_id))
         if response and response.status_code == 200:
             releases = response.json()
             formatted_releases = defaultdict(list)
@@ -270,16 +382,47 @@ class TraktMetadata:
             return dict(formatted_releases)
         return None
 
+    def get_updates(self, media_type, start_date, page=1, limit=UPDATES_PAGE_LIMIT):
+        """Fetch one page of /shows/updates or /movies/updates.
+
+        Returns ({imdb_id: updated_at}, page_count), or (None, 0) on failure.
+        """
+        url = f"{self.base_url}/{media_type}/updates/{start_date.strftime('%Y-%m-%dT%H:00:00Z')}?page={page}&limit={limit}"
+        response = self._make_request(url)
+        if not (response and response.status_code == 200):
+            return None, 0
+
+        item_key = 'show' if media_type == 'shows' else 'movie'
+        updates = {}
+        for entry in response.json():
+            imdb_id = entry.get(item_key, {}).get('ids', {}).get('imdb')
+            if not imdb_id or not entry.get('updated_at'):
+                continue
+            try:
+                updated_at = iso8601.parse_date(entry['updated_at']).astimezone(timezone.utc).replace(tzinfo=None)
+            except iso8601.ParseError:
+                logger.warning(f"Could not parse updated_at: {entry['updated_at']} for {imdb_id}")
+                continue
+            if imdb_id not in updates or updated_at > updates[imdb_id]:
+                updates[imdb_id] = updated_at
+        page_count = int(response.headers.get('X-Pagination-Page-Count', page))
+        return updates, page_count
+
     def convert_tmdb_to_imdb(self, tmdb_id):
         url = f"{self.base_url}/search/tmdb/{tmdb_id}?type=movie,show"
-        response = self._make_request(url)
+        response = self._make_request(url, lookup=('tmdb', tmdb_id))
         if response and response.status_code == 200:
             data = response.json()
-            if data:
+            if not data:
+                negative_cache.record_missing('tmdb', tmdb_id)
+            else:
+                negative_cache.record_found('tmdb', tmdb_id)
                 item = data[0]
                 if 'movie' in item:
+                    id_type_index.record(item['movie']['ids']['imdb'], 'movie')
                     return item['movie']['ids']['imdb'], 'trakt'
                 elif 'show' in item:
+                    id_type_index.record(item['show']['ids']['imdb'], 'show')
                     return item['show']['ids']['imdb'], 'trakt'
         return None, None
     
@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from app.logger_config import logger
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+LANES = (INTERACTIVE, BACKGROUND)
+
+# Trakt's documented default for GET calls: 1000 requests per 5 minutes.
+DEFAULT_LIMIT = 1000
+DEFAULT_PERIOD = 300  # seconds
+DEFAULT_RETRY_AFTER = 10  # seconds, used when a 429 carries no Retry-After
+
+class TraktScheduler:
+    """Token bucket in front of every Trakt request, with two priority lanes.
+
+    Interactive callers (gRPC/REST misses) always get the next token before
+    any background caller, so a bulk refresh can never queue ahead of a user.
+    The bucket is re-seeded from the X-Ratelimit and Retry-After headers of
+    each response.
+    """
+
+    def __init__(self, limit=DEFAULT_LIMIT, period=DEFAULT_PERIOD):
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._capacity = float(limit)
+        self._rate = limit / period
+        self._tokens = float(limit)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = {lane: 0 for lane in LANES}
+        self._stats = {lane: {'requests': 0, 'total_wait': 0.0, 'max_wait': 0.0} for lane in LANES}
+        self._throttled = 0
+
+    @contextmanager
+    def lane(self, name):
+        """Run the enclosed Trakt calls in the given lane (thread-local)."""
+        previous = getattr(self._local, 'lane', INTERACTIVE)
+        self._local.lane = name
+        try:
+            yield
+        finally:
+            self._local.lane = previous
+
+    def current_lane(self):
+        return getattr(self._local, 'lane', INTERACTIVE)
+
+    def _refill(self, now):
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+            self._last_refill = now
+
+    def acquire(self, lane=None):
+        lane = lane or self.current_lane()
+        start = time.monotonic()
+        with self._cond:
+            self._waiting[lane] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    yield_to_interactive = lane == BACKGROUND and self._waiting[INTERACTIVE] > 0
+                    if not yield_to_interactive and now >= self._paused_until and self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    if now < self._paused_until:
+                        timeout = self._paused_until - now
+                    elif self._tokens < 1:
+                        timeout = (1 - self._tokens) / self._rate
+                    else:
+                        timeout = None  # woken when the interactive lane drains
+                    self._cond.wait(timeout)
+            finally:
+                self._waiting[lane] -= 1
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            stats = self._stats[lane]
+            stats['requests'] += 1
+            stats['total_wait'] += waited
+            stats['max_wait'] = max(stats['max_wait'], waited)
+
+        if waited > 1:
+            logger.info(f"Trakt {lane} request waited {waited:.2f}s for rate limit")
+        return waited
+
+    def observe(self, response):
+        """Re-seed the bucket from a Trakt response's rate limit headers."""
+        now = time.monotonic()
+        with self._cond:
+            self._refill(now)
+            raw_limit = response.headers.get('X-Ratelimit')
+            if raw_limit:
+                try:
+                    rate_limit = json.loads(raw_limit)
+                    limit = float(rate_limit['limit'])
+                    period = float(rate_limit['period'])
+                    if limit > 0 and period > 0:
+                        self._capacity = limit
+                        self._rate = limit / period
+                    if 'remaining' in rate_limit:
+                        self._tokens = min(self._tokens, float(rate_limit['remaining']))
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.debug(f"Could not parse X-Ratelimit header {raw_limit!r}: {e}")
+
+            if response.status_code == 429:
+                self._throttled += 1
+                retry_after = self._parse_retry_after(response.headers.get('Retry-After'))
+                self._paused_until = max(self._paused_until, now + retry_after)
+                self._tokens = 0
+                logger.warning(f"Trakt rate limit hit, pausing requests for {retry_after}s")
+            self._cond.notify_all()
+
+    @staticmethod
+    def _parse_retry_after(value):
+        try:
+            return max(float(value), 0)
+        except (TypeError, ValueError):
+            return DEFAULT_RETRY_AFTER
+
+    def get_metrics(self):
+        with self._cond:
+            self._refill(time.monotonic())
+            lanes = {}
+            for lane in LANES:
+                stats = self._stats[lane]
+                lanes[lane] = {
+                    'queue_depth': self._waiting[lane],
+                    'requests': stats['requests'],
+                    'total_wait_seconds': round(stats['total_wait'], 3),
+                    'avg_wait_seconds': round(stats['total_wait'] / stats['requests'], 3) if stats['requests'] else 0.0,
+                    'max_wait_seconds': round(stats['max_wait'], 3)
+                }
+            return {
+                'tokens': round(self._tokens, 2),
+                'capacity': self._capacity,
+                'rate_per_second': round(self._rate, 3),
+                'paused_for_seconds': round(max(self._paused_until - time.monotonic(), 0), 3),
+                'throttled_responses': self._throttled,
+                'lanes': lanes
+            }
+
+trakt_scheduler = TraktScheduler()
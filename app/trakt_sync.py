@@ -0,0 +1,121 @@
+import os
+import pickle
+import threading
+import time
+from datetime import datetime, timedelta
+from app.database import DatabaseManager, Session
+from app.logger_config import logger
+from app.settings import Settings
+from app.trakt_metadata import TraktMetadata, CACHE_FILE
+from app.trakt_scheduler import trakt_scheduler, BACKGROUND
+
+# Trakt only serves the updates feeds for a limited window; a cursor older
+# than this can't be resumed and the sync starts over from now.
+MAX_CURSOR_AGE = timedelta(days=29)
+# Re-read a little of the previous window, the feed start_date is hour-granular.
+CURSOR_OVERLAP = timedelta(hours=1)
+# The feed is trusted for staleness only while polls keep succeeding.
+MISSED_POLLS_BEFORE_FALLBACK = 3
+
+class TraktSync:
+    """Polls Trakt's /shows/updates and /movies/updates feeds.
+
+    Every changed item we hold gets its trakt_updated_at bumped. While the
+    feed is healthy, stored data is stale only when Trakt reports a change
+    newer than our copy; everything else is served from the battery. Data
+    stored before the current sync window began ('origin') and any period
+    where polling has stopped fall back to the time-based threshold.
+    """
+
+    def __init__(self, state_file=CACHE_FILE):
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._state = self._load_state()
+
+    def _load_state(self):
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'rb') as f:
+                    return pickle.load(f)
+            except Exception as e:
+                logger.error(f"Could not read Trakt sync state from {self.state_file}: {str(e)}")
+        return None
+
+    def _save_state(self, state):
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        with open(self.state_file, 'wb') as f:
+            pickle.dump(state, f)
+
+    def is_authoritative(self, last_updated):
+        """True when the updates feed, not the age of last_updated, decides staleness."""
+        settings = Settings()
+        state = self._state
+        if not settings.trakt_sync_enabled or not state:
+            return False
+        max_silence = timedelta(minutes=settings.trakt_sync_interval * MISSED_POLLS_BEFORE_FALLBACK)
+        if datetime.utcnow() - state['last_success'] > max_silence:
+            return False
+        return last_updated >= state['origin']
+
+    def sync_once(self):
+        with self._lock:
+            now = datetime.utcnow()
+            state = self._state
+            if not state or any(now - cursor > MAX_CURSOR_AGE for cursor in state['cursor'].values()):
+                logger.info("Starting a new Trakt updates sync window")
+                state = {'cursor': {'shows': now, 'movies': now}, 'origin': now, 'last_success': now}
+                self._save_state(state)
+                self._state = state
+                return 0
+
+            trakt = TraktMetadata()
+            marked = 0
+            cursor = dict(state['cursor'])
+            with trakt_scheduler.lane(BACKGROUND):
+                for media_type in ('shows', 'movies'):
+                    updates = self._fetch_all_updates(trakt, media_type, cursor[media_type] - CURSOR_OVERLAP)
+                    if updates is None:
+                        logger.warning(f"Trakt {media_type} updates sync failed, keeping cursor at {cursor[media_type]}")
+                        return None
+                    marked += DatabaseManager.mark_upstream_updates(updates)
+                    cursor[media_type] = now
+
+            state = dict(state, cursor=cursor, last_success=now)
+            self._save_state(state)
+            self._state = state
+            logger.info(f"Trakt updates sync marked {marked} battery items as changed upstream")
+            return marked
+
+    @staticmethod
+    def _fetch_all_updates(trakt, media_type, start_date):
+        updates = {}
+        page, page_count = 1, 1
+        while page <= page_count:
+            page_updates, page_count = trakt.get_updates(media_type, start_date, page)
+            if page_updates is None:
+                return None
+            for imdb_id, updated_at in page_updates.items():
+                if imdb_id not in updates or updated_at > updates[imdb_id]:
+                    updates[imdb_id] = updated_at
+            page += 1
+        return updates
+
+    def run_forever(self):
+        while True:
+            try:
+                self.sync_once()
+            except Exception as e:
+                logger.exception(f"Error during Trakt updates sync: {str(e)}")
+            finally:
+                Session.remove()
+            time.sleep(Settings().trakt_sync_interval * 60)
+
+trakt_sync = TraktSync()
+
+def start_trakt_sync():
+    if not Settings().trakt_sync_enabled:
+        logger.info("Trakt updates sync is disabled")
+        return None
+    thread = threading.Thread(target=trakt_sync.run_forever, name='trakt-sync', daemon=True)
+    thread.start()
+    return thread
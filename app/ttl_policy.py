@@ -0,0 +1,125 @@
+import json
+from datetime import datetime, timedelta, timezone
+import iso8601
+from app.settings import Settings
+
+# Multipliers on the staleness threshold by Trakt status. Finished titles
+# rarely change; ones still being made change often.
+STATUS_FACTORS = {
+    'ended': 4.0,
+    'canceled': 4.0,
+    'released': 1.0,
+    'returning series': 1.0,
+    'rumored': 1.0,
+    'planned': 0.5,
+    'in production': 0.5,
+    'post production': 0.5,
+    'upcoming': 0.5,
+}
+STATUS_ACTIVE = ('returning series', 'planned', 'in production', 'post production', 'upcoming', 'rumored')
+# Right around a release, dates, episodes and ratings are still settling
+RELEASE_WINDOW = timedelta(days=14)
+RELEASE_WINDOW_TTL = timedelta(days=1)
+RECENT_RELEASE = timedelta(days=60)
+RECENT_RELEASE_FACTOR = 0.5
+OLD_RELEASE = timedelta(days=5 * 365)
+OLD_RELEASE_FACTOR = 2.0
+# Time since Trakt last changed the item
+RECENT_CHANGE = timedelta(days=7)
+RECENT_CHANGE_FACTOR = 0.5
+UNCHANGED_FOR = timedelta(days=365)
+UNCHANGED_FACTOR = 2.0
+# Items read at least this often are kept fresher
+POPULAR_HITS = 100
+POPULAR_FACTOR = 0.5
+
+def _parse(value):
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = iso8601.parse_date(str(value))
+        except iso8601.ParseError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _load(value):
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return None
+    return value
+
+def release_dates_of(data):
+    """Every release or air date found in a movie or show payload."""
+    dates = [data.get('released'), data.get('first_aired')]
+    release_dates = _load(data.get('release_dates'))
+    if isinstance(release_dates, dict):
+        dates.extend(release.get('date') for releases in release_dates.values() for release in releases or ())
+    seasons = _load(data.get('seasons'))
+    if isinstance(seasons, dict):
+        for season in seasons.values():
+            if isinstance(season, dict):
+                dates.extend(episode.get('first_aired') for episode in (season.get('episodes') or {}).values())
+    return [date for date in map(_parse, dates) if date is not None]
+
+class TTLPolicy:
+    """Works out how long an item's metadata stays fresh.
+
+    Starts from staleness_threshold and scales it by the item's Trakt
+    status, how close it is to a release or episode air date, how long
+    ago Trakt last changed it and how often it is read. An upcoming
+    release caps the window at half the time left before it, so the item
+    is looked at again before it comes out. The result is clamped to
+    [ttl_min, ttl_max] and stored in Item.ttl_seconds on every write.
+    """
+
+    @staticmethod
+    def ttl_for(item, data, now=None):
+        settings = Settings()
+        base = settings.staleness_threshold_timedelta
+        now = now or datetime.utcnow()
+        factor = STATUS_FACTORS.get((data.get('status') or '').lower(), 1.0)
+        cap = timedelta(seconds=settings.ttl_max)
+
+        dates = release_dates_of(data)
+        upcoming = [date for date in dates if date > now]
+        past = [date for date in dates if date <= now]
+        if upcoming:
+            until_release = min(upcoming) - now
+            cap = min(cap, RELEASE_WINDOW_TTL if until_release <= RELEASE_WINDOW else until_release / 2)
+        if past:
+            since_release = now - max(past)
+            if since_release <= RELEASE_WINDOW:
+                cap = min(cap, RELEASE_WINDOW_TTL)
+            elif since_release <= RECENT_RELEASE:
+                factor *= RECENT_RELEASE_FACTOR
+            elif since_release >= OLD_RELEASE and not upcoming and (data.get('status') or '').lower() not in STATUS_ACTIVE:
+                factor *= OLD_RELEASE_FACTOR
+
+        changed = [date for date in (_parse(data.get('updated_at')), item.trakt_updated_at) if date is not None]
+        if changed:
+            since_change = now - max(changed)
+            if since_change <= RECENT_CHANGE:
+                factor *= RECENT_CHANGE_FACTOR
+            elif since_change >= UNCHANGED_FOR:
+                factor *= UNCHANGED_FACTOR
+
+        if (item.hit_count or 0) >= POPULAR_HITS:
+            factor *= POPULAR_FACTOR
+
+        ttl = min(base * factor, cap)
+        return max(timedelta(seconds=settings.ttl_min), min(ttl, timedelta(seconds=settings.ttl_max)))
+
+    @staticmethod
+    def freshness_window(item):
+        """The item's stored TTL, or staleness_threshold without one or with adaptive_ttl off."""
+        settings = Settings()
+        if settings.adaptive_ttl and item is not None and getattr(item, 'ttl_seconds', None):
+            return timedelta(seconds=item.ttl_seconds)
+        return settings.staleness_threshold_timedelta
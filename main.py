@@ -6,6 +6,10 @@ from sqlalchemy import inspect, text
 from sqlalchemy.exc import OperationalError
 import threading
 from app.grpc_service import serve as grpc_serve
+from app.trakt_sync import start_trakt_sync
+from app.trakt_auth import start_token_refresher
+from app.access_tracker import start_access_tracker
+from app.search_index import start_search_backfill
 import logging
 from logging.handlers import RotatingFileHandler
 import os
@@ -63,6 +67,18 @@ if __name__ == '__main__':
         import sys
         sys.exit(1)
 
+    # Renew the Trakt access token ahead of expiry, off the request path
+    start_token_refresher()
+
+    # Follow Trakt's updates feeds so only changed items get refreshed
+    start_trakt_sync()
+
+    # Record item reads in batches and keep the battery within max_entries
+    start_access_tracker()
+
+    # Index items stored before title search existed
+    start_search_backfill()
+
     # Start gRPC server in a separate thread
     grpc_thread = threading.Thread(target=run_grpc_server, daemon=True)
     grpc_thread.start()
@@ -69,6 +69,11 @@ class MetadataServiceStub(object):
                 request_serializer=metadata__service__pb2.BatchIMDbRequest.SerializeToString,
                 response_deserializer=metadata__service__pb2.BatchMetadataResponse.FromString,
                 _registered_method=True)
+        self.SearchTitles = channel.unary_unary(
+                '/metadata.MetadataService/SearchTitles',
+                request_serializer=metadata__service__pb2.SearchRequest.SerializeToString,
+                response_deserializer=metadata__service__pb2.SearchResponse.FromString,
+                _registered_method=True)
 
 
 class MetadataServiceServicer(object):
@@ -116,6 +121,12 @@ class MetadataServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def SearchTitles(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_MetadataServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -154,6 +165,11 @@ def add_MetadataServiceServicer_to_server(servicer, server):
                     request_deserializer=metadata__service__pb2.BatchIMDbRequest.FromString,
                     response_serializer=metadata__service__pb2.BatchMetadataResponse.SerializeToString,
             ),
+            'SearchTitles': grpc.unary_unary_rpc_method_handler(
+                    servicer.SearchTitles,
+                    request_deserializer=metadata__service__pb2.SearchRequest.FromString,
+                    response_serializer=metadata__service__pb2.SearchResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'metadata.MetadataService', rpc_method_handlers)
@@ -353,3 +369,30 @@ class MetadataService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def SearchTitles(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/metadata.MetadataService/SearchTitles',
+            metadata__service__pb2.SearchRequest.SerializeToString,
+            metadata__service__pb2.SearchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,89 @@
+"""Remove duplicate (item_id, key) metadata rows and add their unique index.
+
+Older write paths could store the same key twice for an item, which keeps
+uix_metadata_item_key from being created; the battery refuses to start
+until they are gone. For each duplicated key the newest row (highest id)
+is kept. Rows with a NULL item_id or key are never duplicates and are
+left alone. Every deleted row is first appended to the --backup file as
+a JSON line. Run with --dry-run to only count them.
+
+    python migrate_metadata_dedupe.py --database-url postgresql://... [--backup metadata_duplicates.jsonl] [--dry-run]
+"""
+import argparse
+import json
+import os
+from sqlalchemy import create_engine, and_, func
+from app.database import Base, Session, Metadata
+
+DEFAULT_DATABASE_URL = 'postgresql://cli_debrid:cli_debrid@db:5432/cli_battery_database'
+INDEX_NAME = 'uix_metadata_item_key'
+
+def duplicate_rows(session):
+    """Metadata rows that share (item_id, key) with a newer row, oldest first."""
+    newest = (
+        session.query(Metadata.item_id, Metadata.key, func.max(Metadata.id).label('keep_id'))
+        .filter(Metadata.item_id.isnot(None), Metadata.key.isnot(None))
+        .group_by(Metadata.item_id, Metadata.key)
+        .having(func.count(Metadata.id) > 1)
+        .subquery()
+    )
+    return (
+        session.query(Metadata)
+        .join(newest, and_(Metadata.item_id == newest.c.item_id, Metadata.key == newest.c.key))
+        .filter(Metadata.id != newest.c.keep_id)
+        .order_by(Metadata.id)
+    )
+
+def backup_row(row):
+    return json.dumps({
+        'id': row.id,
+        'item_id': row.item_id,
+        'key': row.key,
+        'value': row.value,
+        'provider': row.provider,
+        'last_updated': row.last_updated.isoformat() if row.last_updated else None
+    })
+
+def delete_batch(session, rows, backup):
+    for row in rows:
+        backup.write(backup_row(row) + '\n')
+    backup.flush()
+    os.fsync(backup.fileno())
+    session.query(Metadata).filter(Metadata.id.in_([row.id for row in rows])).delete(synchronize_session=False)
+    session.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description='Remove duplicate metadata rows and create their unique index')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URL))
+    parser.add_argument('--batch-size', type=int, default=500, help='Rows deleted per transaction')
+    parser.add_argument('--backup', default='metadata_duplicates.jsonl', help='File the deleted rows are appended to')
+    parser.add_argument('--dry-run', action='store_true', help='Only count the duplicate rows')
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(engine)
+    Session.configure(bind=engine)
+
+    with Session() as session:
+        total = duplicate_rows(session).count()
+    print(f"Found {total} duplicate metadata rows")
+    if args.dry_run:
+        return
+
+    deleted = 0
+    with open(args.backup, 'a') as backup:
+        while True:
+            with Session() as session:
+                rows = duplicate_rows(session).limit(args.batch_size).all()
+                if not rows:
+                    break
+                delete_batch(session, rows, backup)
+            deleted += len(rows)
+            print(f"Deleted {deleted} of {total} rows, saved to {args.backup}")
+
+    index = next(index for index in Metadata.__table__.indexes if index.name == INDEX_NAME)
+    index.create(engine, checkfirst=True)
+    print(f"Unique index {INDEX_NAME} is in place")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Copy key/value metadata rows into per-item JSON documents.
+
+Run this before (or right after) setting metadata_storage to 'document'.
+Items that already have a document are left alone, so the script can be
+re-run safely. Reads fall back to the rows for anything not migrated yet.
+--delete-rows is only accepted together with --switch, or once
+metadata_storage is already 'document'.
+
+    python migrate_metadata_storage.py --database-url postgresql://... [--delete-rows] [--switch]
+"""
+import argparse
+import os
+from collections import defaultdict
+from sqlalchemy import create_engine
+from app.database import Base, Session, Item, Metadata, ItemDocument, DatabaseManager, upsert_rows
+from app.settings import Settings
+
+DEFAULT_DATABASE_URL = 'postgresql://cli_debrid:cli_debrid@db:5432/cli_battery_database'
+
+def migrate_batch(session, item_ids, delete_rows):
+    migrated = {item_id for (item_id,) in session.query(ItemDocument.item_id).filter(ItemDocument.item_id.in_(item_ids))}
+    pending = [item_id for item_id in item_ids if item_id not in migrated]
+    if not pending:
+        return 0
+
+    grouped = defaultdict(list)
+    for row in session.query(Metadata).filter(Metadata.item_id.in_(pending)).order_by(Metadata.item_id, Metadata.id):
+        grouped[(row.item_id, (row.provider or 'trakt').lower())].append(row)
+
+    documents = [
+        {
+            'item_id': item_id,
+            'provider': provider,
+            'document': DatabaseManager.decode_metadata_rows(rows),
+            'updated_at': max(row.last_updated for row in rows)
+        }
+        for (item_id, provider), rows in grouped.items()
+    ]
+    upsert_rows(session, ItemDocument.__table__, documents, ['item_id', 'provider'], ['document', 'updated_at'])
+    if delete_rows:
+        session.query(Metadata).filter(Metadata.item_id.in_(pending)).delete(synchronize_session=False)
+    session.commit()
+    return len(documents)
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate metadata rows to per-item JSON documents')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URL))
+    parser.add_argument('--batch-size', type=int, default=500, help='Items per transaction')
+    parser.add_argument('--delete-rows', action='store_true', help='Delete the migrated key/value rows')
+    parser.add_argument('--switch', action='store_true', help="Set metadata_storage to 'document' when done")
+    args = parser.parse_args()
+    if args.delete_rows and not args.switch and Settings().metadata_storage != 'document':
+        # In 'rows' mode documents are never read, so the rows are the only copy
+        parser.error("--delete-rows needs --switch, or metadata_storage already set to 'document'")
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(engine)
+    Session.configure(bind=engine)
+
+    last_id, items, documents = 0, 0, 0
+    while True:
+        with Session() as session:
+            item_ids = [item_id for (item_id,) in session.query(Item.id).filter(Item.id > last_id).order_by(Item.id).limit(args.batch_size)]
+            if not item_ids:
+                break
+            documents += migrate_batch(session, item_ids, args.delete_rows)
+        items += len(item_ids)
+        last_id = item_ids[-1]
+        print(f"Scanned {items} items, wrote {documents} documents")
+
+    if args.switch:
+        settings = Settings()
+        settings.metadata_storage = 'document'
+        settings.save()
+        print("metadata_storage set to 'document'")
+
+if __name__ == '__main__':
+    main()
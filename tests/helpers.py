@@ -0,0 +1,25 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from app import database
+from app.database import Session
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Runs each test against a fresh SQLite battery in a temporary directory."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        app = SimpleNamespace(config={'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory.name, 'battery.db')}"})
+        database.init_db(app)
+        self.addCleanup(self._close)
+
+    @staticmethod
+    def _close():
+        Session.remove()
+        database.engine.dispose()
+        if database.writer_engine is not None:
+            database.writer_engine.dispose()
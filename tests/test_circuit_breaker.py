@@ -0,0 +1,64 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from app import circuit_breaker as circuit_breaker_module
+from app.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        clock = mock.patch.object(circuit_breaker_module, 'time', SimpleNamespace(monotonic=lambda: self.now))
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.breaker = CircuitBreaker('Test', failure_threshold=3, reset_timeout=60)
+
+    def _fail(self, times):
+        for _ in range(times):
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        self._fail(2)
+        self.assertTrue(self.breaker.allow_request())
+        self._fail(1)
+        self.assertFalse(self.breaker.allow_request())
+        self.assertTrue(self.breaker.is_open())
+        self.assertEqual(self.breaker.get_status(), {'state': OPEN, 'consecutive_failures': 3})
+
+    def test_success_resets_the_count(self):
+        self._fail(2)
+        self.breaker.record_success()
+        self._fail(2)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_one_trial_after_the_timeout(self):
+        self._fail(3)
+        self.now += 60
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+        self.assertEqual(self.breaker.get_status()['state'], HALF_OPEN)
+
+    def test_trial_outcome_closes_or_reopens(self):
+        self._fail(3)
+        self.now += 60
+        self.breaker.allow_request()
+        self.breaker.record_failure()
+        self.assertFalse(self.breaker.allow_request())
+
+        self.now += 60
+        self.breaker.allow_request()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.get_status()['state'], CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_lost_trial_does_not_block_forever(self):
+        self._fail(3)
+        self.now += 60
+        self.breaker.allow_request()
+        self.now += 60
+        self.assertTrue(self.breaker.allow_request())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from unittest import mock
+
+from app import id_type_index as id_type_index_module
+from app import maintenance
+from app.database import Session, Item, ItemTypeIndex, IndependentSession
+from app.id_type_index import IdTypeIndex, id_type_index
+from tests.helpers import DatabaseTestCase
+
+
+class IdTypeIndexTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.index = IdTypeIndex()
+        sessions = mock.patch.object(id_type_index_module, 'IndependentSession', wraps=IndependentSession)
+        self.sessions = sessions.start()
+        self.addCleanup(sessions.stop)
+
+    def test_unknown_id_is_looked_up_once(self):
+        self.assertIsNone(self.index.lookup('tt404'))
+        self.assertIsNone(self.index.lookup('tt404'))
+        self.assertEqual(self.sessions.call_count, 1)
+
+    def test_recording_an_unknown_id_replaces_the_miss(self):
+        self.index.lookup('tt1')
+        self.index.record('tt1', 'show')
+        self.assertEqual(self.index.lookup('tt1'), 'show')
+
+    def test_falls_back_to_the_item_type(self):
+        with Session() as session:
+            session.add(Item(imdb_id='tt1', title='a', type='movie'))
+            session.commit()
+        self.assertEqual(self.index.lookup('tt1'), 'movie')
+
+    def test_flushed_entries_outlive_the_memory_copy(self):
+        self.index.record_many({'tt1': 'movie', 'tt2': 'episode'})
+        self.assertEqual(self.index.flush(), 2)
+        self.assertEqual(self.index.flush(), 0)
+        with Session() as session:
+            self.assertEqual(session.get(ItemTypeIndex, 'tt2').type, 'episode')
+        self.assertEqual(IdTypeIndex().lookup('tt2'), 'episode')
+
+    def test_memory_is_bounded(self):
+        with mock.patch.object(id_type_index_module, 'MAX_KNOWN_TYPES', 2):
+            self.index.record_many({'tt1': 'movie', 'tt2': 'movie'})
+            self.index.lookup('tt1')
+            self.index.record('tt3', 'show')
+            self.index.flush()
+            self.assertEqual(list(self.index._types), ['tt1', 'tt3'])
+            # The table still knows the entry dropped from memory
+            self.assertEqual(self.index.lookup('tt2'), 'movie')
+
+    def test_flushed_by_the_maintenance_thread(self):
+        self.assertIn(id_type_index.flush, maintenance._flush_hooks)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from app.database import Session, Item, Metadata, ItemDocument, Season, Episode, upsert_rows
+from app.metadata_manager import MetadataManager, _shared_ttl
+from app.settings import Settings
+from tests.helpers import DatabaseTestCase
+
+
+class StatsTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with Session() as session:
+            session.add_all([
+                Item(id=1, imdb_id='tt1', title='Rows', type='movie'),
+                Item(id=2, imdb_id='tt2', title='Document', type='movie'),
+                Metadata(item_id=1, key='title', value='"Rows"', provider='trakt', last_updated=datetime(2024, 1, 1)),
+                Metadata(item_id=1, key='year', value='2000', provider='trakt', last_updated=datetime(2024, 1, 1)),
+                ItemDocument(item_id=2, provider='trakt', document={'title': 'Document'}, updated_at=datetime(2024, 6, 1)),
+            ])
+            session.commit()
+
+    def test_rows_only_in_rows_mode(self):
+        with mock.patch.object(Settings(), 'metadata_storage', 'rows'):
+            stats = MetadataManager._compute_stats()
+        self.assertEqual(stats['total_items'], 2)
+        self.assertEqual(stats['total_metadata'], 2)
+        self.assertEqual(stats['providers'], {'trakt': 2})
+        self.assertEqual(stats['last_update'], datetime(2024, 1, 1))
+
+    def test_documents_are_counted_in_document_mode(self):
+        with mock.patch.object(Settings(), 'metadata_storage', 'document'):
+            stats = MetadataManager._compute_stats()
+        self.assertEqual(stats['total_metadata'], 3)
+        self.assertEqual(stats['providers'], {'trakt': 3})
+        self.assertEqual(stats['last_update'], datetime(2024, 6, 1))
+
+
+class SharedTTLTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.multiple(Settings(), shared_cache_max_ttl=3600, adaptive_ttl=True, trakt_sync_enabled=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with Session() as session:
+            session.add(Item(imdb_id='tt1', title='a', type='movie', ttl_seconds=600,
+                             updated_at=datetime.utcnow() - timedelta(seconds=100)))
+            session.commit()
+
+    def test_capped_at_the_time_left_before_refresh(self):
+        self.assertAlmostEqual(_shared_ttl('tt1'), 500, delta=5)
+
+    def test_unknown_item_gets_the_maximum(self):
+        self.assertEqual(_shared_ttl('tt404'), 3600)
+
+    def test_leaves_the_callers_session_open(self):
+        with Session() as session:
+            item = session.query(Item).filter_by(imdb_id='tt1').one()
+            _shared_ttl('tt1')
+            self.assertIn(item, session)
+
+
+def _episode(title, first_aired='2020-01-01T00:00:00.000Z'):
+    return {'title': title, 'overview': '', 'runtime': 30, 'first_aired': first_aired, 'imdb_id': None}
+
+
+class SeasonsAndEpisodesTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with Session() as session:
+            session.add(Item(imdb_id='tt1', title='Show', type='show'))
+            session.commit()
+
+    def _stored(self):
+        with Session() as session:
+            seasons = {season.season_number: season.episode_count for season in session.query(Season)}
+            episodes = {
+                (season_number, episode.episode_number): episode.title
+                for episode, season_number in session.query(Episode, Season.season_number).join(Season)
+            }
+        return seasons, episodes
+
+    def test_new_seasons_are_stored_whatever_their_episode_count(self):
+        seasons_data = {
+            1: {'episode_count': 2, 'episodes': {1: _episode('Pilot'), 2: _episode('Two')}},
+            2: {'episode_count': None, 'episodes': {1: _episode('Premiere', None)}},
+        }
+        self.assertTrue(MetadataManager.add_or_update_seasons_and_episodes('tt1', seasons_data))
+        seasons, episodes = self._stored()
+        self.assertEqual(seasons, {1: 2, 2: None})
+        self.assertEqual(episodes, {(1, 1): 'Pilot', (1, 2): 'Two', (2, 1): 'Premiere'})
+
+    def test_only_changed_episodes_are_written(self):
+        seasons_data = {1: {'episode_count': 2, 'episodes': {1: _episode('Pilot'), 2: _episode('Two')}}}
+        MetadataManager.add_or_update_seasons_and_episodes('tt1', seasons_data)
+
+        seasons_data[1]['episode_count'] = 3
+        seasons_data[1]['episodes'][2] = _episode('Two (renamed)')
+        seasons_data[1]['episodes'][3] = _episode('Three')
+        with mock.patch('app.metadata_manager.upsert_rows', wraps=upsert_rows) as upsert:
+            MetadataManager.add_or_update_seasons_and_episodes('tt1', seasons_data)
+        written = {call.args[1].name: call.args[2] for call in upsert.call_args_list}
+        self.assertEqual([row['episode_number'] for row in written['episodes']], [2, 3])
+        self.assertEqual([row['episode_count'] for row in written['seasons']], [3])
+
+        seasons, episodes = self._stored()
+        self.assertEqual(seasons, {1: 3})
+        self.assertEqual(episodes, {(1, 1): 'Pilot', (1, 2): 'Two (renamed)', (1, 3): 'Three'})
+
+    def test_unchanged_payload_writes_nothing(self):
+        seasons_data = {1: {'episode_count': 1, 'episodes': {1: _episode('Pilot')}}}
+        MetadataManager.add_or_update_seasons_and_episodes('tt1', seasons_data)
+        with mock.patch('app.metadata_manager.upsert_rows', wraps=upsert_rows) as upsert:
+            MetadataManager.add_or_update_seasons_and_episodes('tt1', seasons_data)
+        self.assertEqual([call.args[2] for call in upsert.call_args_list], [[]])
+
+
+class UpsertRowsTest(DatabaseTestCase):
+    def test_inserts_new_keys_and_updates_existing_ones(self):
+        with Session() as session:
+            session.add(Item(id=1, imdb_id='tt1', title='a', type='movie'))
+            session.commit()
+            rows = [{'item_id': 1, 'key': key, 'value': '"old"', 'provider': 'trakt'} for key in ('title', 'year')]
+            upsert_rows(session, Metadata.__table__, rows, ['item_id', 'key'], ['value'])
+            upsert_rows(session, Metadata.__table__, [{'item_id': 1, 'key': 'year', 'value': '"new"', 'provider': 'trakt'}],
+                        ['item_id', 'key'], ['value'])
+            session.commit()
+            stored = {row.key: row.value for row in session.query(Metadata)}
+        self.assertEqual(stored, {'title': '"old"', 'year': '"new"'})
+
+
+if __name__ == '__main__':
+    unittest.main()
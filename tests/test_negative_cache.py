@@ -0,0 +1,92 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from app import negative_cache as negative_cache_module
+from app.database import Session, NegativeLookup
+from app.negative_cache import NegativeLookupCache
+from app.settings import Settings
+from tests.helpers import DatabaseTestCase
+
+
+class NegativeLookupCacheTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.multiple(Settings(), negative_cache_ttl=60, negative_cache_max_ttl=200)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = NegativeLookupCache()
+
+    def _expire(self, cache, key):
+        misses, _ = cache._entries[key]
+        cache._entries[key] = (misses, datetime.utcnow() - timedelta(seconds=1))
+
+    def _backoff(self, key):
+        return (self.cache._entries[key][1] - datetime.utcnow()).total_seconds()
+
+    def test_miss_holds_off_trakt(self):
+        self.assertFalse(self.cache.is_missing('movie', 'tt1'))
+        self.cache.record_missing('movie', 'tt1')
+        self.assertTrue(self.cache.is_missing('movie', 'tt1'))
+        self.assertFalse(self.cache.is_missing('show', 'tt1'))
+
+    def test_backoff_doubles_up_to_the_maximum(self):
+        backoffs = []
+        for _ in range(4):
+            self.cache.record_missing('movie', 'tt1')
+            backoffs.append(round(self._backoff(('movie', 'tt1')), -1))
+            self._expire(self.cache, ('movie', 'tt1'))
+        self.assertEqual(backoffs, [60, 120, 200, 200])
+
+    def test_concurrent_misses_count_once(self):
+        self.cache.record_missing('movie', 'tt1')
+        self.cache.record_missing('movie', 'tt1')
+        self.assertEqual(self.cache._entries[('movie', 'tt1')][0], 1)
+
+    def test_found_resets_the_backoff(self):
+        self.cache.record_missing('movie', 'tt1')
+        self.cache.record_found('movie', 'tt1')
+        self.assertFalse(self.cache.is_missing('movie', 'tt1'))
+        self.cache.record_missing('movie', 'tt1')
+        self.assertEqual(self.cache._entries[('movie', 'tt1')][0], 1)
+
+    def test_disabled_with_a_zero_ttl(self):
+        with mock.patch.object(Settings(), 'negative_cache_ttl', 0):
+            self.cache.record_missing('movie', 'tt1')
+            self.assertFalse(self.cache.is_missing('movie', 'tt1'))
+
+    def test_flush_shares_misses_with_other_replicas(self):
+        self.cache.record_missing('movie', 'tt1')
+        self.cache.record_missing('tmdb', '42')
+        self.assertEqual(self.cache.flush(), 2)
+        self.assertTrue(NegativeLookupCache().is_missing('tmdb', '42'))
+
+        self.cache.record_found('movie', 'tt1')
+        self.cache.flush()
+        with Session() as session:
+            self.assertEqual([(row.kind, row.lookup_id) for row in session.query(NegativeLookup)], [('tmdb', '42')])
+
+    def test_failed_flush_is_retried(self):
+        self.cache.record_missing('movie', 'tt1')
+        with mock.patch.object(negative_cache_module, 'upsert_rows', side_effect=Exception('database is locked')):
+            self.assertEqual(self.cache.flush(), 0)
+        self.assertEqual(self.cache.flush(), 1)
+
+    def test_found_lookups_are_not_read_twice(self):
+        with mock.patch.object(negative_cache_module, 'IndependentSession',
+                               wraps=negative_cache_module.IndependentSession) as sessions:
+            self.cache.is_missing('movie', 'tt1')
+            self.cache.is_missing('movie', 'tt1')
+        self.assertEqual(sessions.call_count, 1)
+
+    def test_purge_drops_long_expired_entries(self):
+        self.cache.record_missing('movie', 'tt1')
+        self.cache.flush()
+        with Session() as session:
+            session.query(NegativeLookup).update({'retry_at': datetime.utcnow() - timedelta(seconds=300)})
+            session.commit()
+        self.assertEqual(self.cache.purge(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from app.settings import Settings
+from app import result_cache as result_cache_module
+from app.result_cache import ResultCache, cached_result
+from app.shared_cache import MemorySharedCache, NullSharedCache
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.multiple(Settings(), result_cache_size=3, result_cache_ttl=300,
+                                      shared_cache_max_ttl=3600, shared_cache_lock_timeout=1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        shared = mock.patch.object(result_cache_module, 'get_shared_cache', return_value=NullSharedCache())
+        shared.start()
+        self.addCleanup(shared.stop)
+        self.cache = ResultCache()
+
+    def test_stats_on_a_cold_cache(self):
+        stats = {}
+        thread = threading.Thread(target=lambda: stats.update(self.cache.get_stats()), daemon=True)
+        thread.start()
+        thread.join(2)
+        self.assertFalse(thread.is_alive(), "get_stats() deadlocked before the shared tier was set up")
+        self.assertEqual(stats['size'], 0)
+        self.assertEqual(stats['shared'], {'backend': 'none'})
+
+    def test_hit_returns_a_copy(self):
+        hit, generation = self.cache.get(('op', 'tt1'))
+        self.assertFalse(hit)
+        self.cache.put(('op', 'tt1'), 'tt1', ({'title': 'a'}, 'battery'), generation)
+        hit, value = self.cache.get(('op', 'tt1'))
+        self.assertTrue(hit)
+        value[0]['title'] = 'changed'
+        self.assertEqual(self.cache.get(('op', 'tt1'))[1], ({'title': 'a'}, 'battery'))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        for imdb_id in ('tt1', 'tt2', 'tt3'):
+            self.cache.put(('op', imdb_id), imdb_id, imdb_id, 0)
+        self.cache.get(('op', 'tt1'))
+        self.cache.put(('op', 'tt4'), 'tt4', 'tt4', 0)
+        self.assertFalse(self.cache.get(('op', 'tt2'))[0])
+        self.assertTrue(self.cache.get(('op', 'tt1'))[0])
+        self.assertEqual(self.cache.get_stats()['evictions'], 1)
+
+    def test_expired_entry_misses(self):
+        with mock.patch.object(Settings(), 'result_cache_ttl', 0):
+            self.cache.put(('op', 'tt1'), 'tt1', 'value', 0)
+        self.assertFalse(self.cache.get(('op', 'tt1'))[0])
+
+    def test_invalidate_drops_every_view_of_the_item(self):
+        self.cache.put(('movie', 'tt1'), 'tt1', 'a', 0)
+        self.cache.put(('bundle', 'tt1'), 'tt1', 'b', 0)
+        self.cache.put(('movie', 'tt2'), 'tt2', 'c', 0)
+        self.cache.invalidate('tt1')
+        self.assertFalse(self.cache.get(('movie', 'tt1'))[0])
+        self.assertFalse(self.cache.get(('bundle', 'tt1'))[0])
+        self.assertTrue(self.cache.get(('movie', 'tt2'))[0])
+
+    def test_load_that_overlapped_an_invalidation_is_not_stored(self):
+        _, generation = self.cache.get(('op', 'tt1'))
+        self.cache.invalidate('tt1')
+        self.assertFalse(self.cache.put(('op', 'tt1'), 'tt1', 'old', generation))
+        self.assertFalse(self.cache.get(('op', 'tt1'))[0])
+
+
+class CachedResultTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.multiple(Settings(), result_cache_size=100, result_cache_ttl=300,
+                                      shared_cache_max_ttl=3600, shared_cache_lock_timeout=1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.shared = MemorySharedCache()
+        shared = mock.patch.object(result_cache_module, 'get_shared_cache', return_value=self.shared)
+        shared.start()
+        self.addCleanup(shared.stop)
+        cache = mock.patch.object(result_cache_module, 'result_cache', ResultCache())
+        self.cache = cache.start()
+        self.addCleanup(cache.stop)
+
+    def test_battery_results_are_cached_in_both_tiers(self):
+        calls = []
+
+        @cached_result('op', lambda result: result[1] == 'battery')
+        def load(imdb_id):
+            calls.append(imdb_id)
+            return {'title': 'a'}, 'battery'
+
+        self.assertEqual(load('tt1'), ({'title': 'a'}, 'battery'))
+        self.assertEqual(load('tt1'), ({'title': 'a'}, 'battery'))
+        self.assertEqual(calls, ['tt1'])
+        self.assertEqual(self.shared.get('tt1', 'op'), ({'title': 'a'}, 'battery'))
+
+    def test_uncacheable_results_are_loaded_every_time(self):
+        calls = []
+
+        @cached_result('op', lambda result: result[1] == 'battery')
+        def load(imdb_id):
+            calls.append(imdb_id)
+            return {'title': 'a'}, 'trakt'
+
+        load('tt1')
+        load('tt1')
+        self.assertEqual(len(calls), 2)
+        self.assertIsNone(self.shared.get('tt1', 'op'))
+
+    def test_shared_tier_serves_a_local_miss(self):
+        self.shared.set('tt1', 'op', ('shared', 'battery'), 60, self.shared.version('tt1'))
+
+        @cached_result('op', lambda result: True)
+        def load(imdb_id):
+            raise AssertionError('loader should not run')
+
+        self.assertEqual(load('tt1'), ('shared', 'battery'))
+        self.assertEqual(self.cache.shared_hits, 1)
+
+    def test_invalidation_during_the_load_keeps_the_old_value_out_of_both_tiers(self):
+        value = {'current': 'old'}
+        calls = []
+
+        @cached_result('op', lambda result: True)
+        def load(imdb_id):
+            calls.append(imdb_id)
+            loaded = value['current']
+            if len(calls) == 1:
+                value['current'] = 'new'
+                self.cache.invalidate(imdb_id)
+            return loaded, 'battery'
+
+        self.assertEqual(load('tt1'), ('old', 'battery'))
+        self.assertIsNone(self.shared.get('tt1', 'op'))
+        self.assertEqual(load('tt1'), ('new', 'battery'))
+        self.assertEqual(len(calls), 2)
+
+    def test_waiter_takes_the_lock_holders_result(self):
+        started = threading.Event()
+        calls = []
+
+        @cached_result('op', lambda result: True)
+        def load(imdb_id):
+            calls.append(imdb_id)
+            started.set()
+            time.sleep(0.2)
+            return 'loaded', 'battery'
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(load('tt1')))
+        leader.start()
+        started.wait(1)
+        # A second replica: its own local cache, the same shared tier
+        with mock.patch.object(result_cache_module, 'result_cache', ResultCache()):
+            results.append(load('tt1'))
+        leader.join()
+        self.assertEqual(results, [('loaded', 'battery')] * 2)
+        self.assertEqual(calls, ['tt1'])
+
+
+class MemorySharedCacheTest(unittest.TestCase):
+    def test_set_with_an_outdated_version_is_refused(self):
+        shared = MemorySharedCache()
+        version = shared.version('tt1')
+        shared.invalidate(['tt1'])
+        self.assertFalse(shared.set('tt1', 'op', 'old', 60, version))
+        self.assertTrue(shared.set('tt1', 'op', 'new', 60, shared.version('tt1')))
+        self.assertEqual(shared.get('tt1', 'op'), 'new')
+
+    def test_lock_is_exclusive_until_released(self):
+        shared = MemorySharedCache()
+        token = shared.acquire_lock('op:tt1', 5)
+        self.assertIsNotNone(token)
+        self.assertIsNone(shared.acquire_lock('op:tt1', 5))
+        shared.release_lock('op:tt1', token)
+        self.assertFalse(shared.is_locked('op:tt1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base, _add_missing_unique_indexes
+
+
+class MissingUniqueIndexTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.engine = create_engine(f"sqlite:///{os.path.join(directory.name, 'battery.db')}")
+        self.addCleanup(self.engine.dispose)
+        Base.metadata.create_all(self.engine)
+        with self.engine.begin() as conn:
+            conn.execute(text('DROP INDEX uix_metadata_item_key'))
+            conn.execute(text("INSERT INTO items (id, imdb_id, title, type) VALUES (1, 'tt1', 'a', 'movie')"))
+
+    def _add_metadata(self, *rows):
+        with self.engine.begin() as conn:
+            for item_id, key in rows:
+                conn.execute(text("INSERT INTO metadata (item_id, key, value, provider) VALUES (:item_id, :key, 'v', 'trakt')"),
+                             {'item_id': item_id, 'key': key})
+
+    def _metadata_indexes(self):
+        return {index['name'] for index in inspect(self.engine).get_indexes('metadata')}
+
+    def test_index_is_created_when_keys_are_unique(self):
+        self._add_metadata((1, 'title'), (1, 'year'))
+        _add_missing_unique_indexes(self.engine)
+        self.assertIn('uix_metadata_item_key', self._metadata_indexes())
+
+    def test_duplicates_stop_startup_and_are_kept(self):
+        self._add_metadata((1, 'title'), (1, 'title'))
+        with self.assertRaisesRegex(Exception, 'migrate_metadata_dedupe.py'):
+            _add_missing_unique_indexes(self.engine)
+        self.assertNotIn('uix_metadata_item_key', self._metadata_indexes())
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(text('SELECT COUNT(*) FROM metadata')).scalar(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import threading
+import unittest
+from datetime import date, datetime
+
+from app.shared_cache import RedisSharedCache, decode_value, encode_value, redis
+
+try:
+    import fakeredis
+except ImportError:  # the Redis tests need a fake server
+    fakeredis = None
+
+
+class EncodingTest(unittest.TestCase):
+    def test_round_trip_keeps_python_types(self):
+        value = (
+            {1: {'episode_count': 2, 'episodes': {1: {'title': 'Pilot'}}}},
+            'battery',
+            {'released': date(2020, 1, 2), 'updated_at': datetime(2024, 5, 6, 7, 8, 9), 'genres': ['drama']},
+            {'__tuple__': 'a key that looks like a tag'},
+        )
+        self.assertEqual(decode_value(encode_value(value)), value)
+
+
+@unittest.skipIf(redis is None or fakeredis is None, 'needs the redis and fakeredis packages')
+class RedisSharedCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.server = fakeredis.FakeServer()
+        self.cache = self._replica()
+
+    def _replica(self):
+        cache = RedisSharedCache('redis://localhost:6379/0', 'test:', 3600)
+        cache.client = fakeredis.FakeRedis(server=self.server)
+        return cache
+
+    def test_set_and_get(self):
+        self.assertIsNone(self.cache.get('tt1', 'movie'))
+        self.assertTrue(self.cache.set('tt1', 'movie', ({'title': 'a'}, 'battery'), 60, self.cache.version('tt1')))
+        self.assertEqual(self._replica().get('tt1', 'movie'), ({'title': 'a'}, 'battery'))
+
+    def test_expired_entries_miss(self):
+        self.cache.set('tt1', 'movie', 'value', -1, self.cache.version('tt1'))
+        self.assertIsNone(self.cache.get('tt1', 'movie'))
+
+    def test_invalidation_on_another_replica_refuses_the_older_load(self):
+        version = self.cache.version('tt1')
+        self.cache.set('tt1', 'bundle', 'cached', 60, version)
+        self._replica().invalidate(['tt1'])
+        self.assertIsNone(self.cache.get('tt1', 'bundle'))
+        self.assertFalse(self.cache.set('tt1', 'movie', 'old', 60, version))
+        self.assertTrue(self.cache.set('tt1', 'movie', 'new', 60, self.cache.version('tt1')))
+
+    def test_lock_is_only_released_by_its_holder(self):
+        token = self.cache.acquire_lock('movie:tt1', 5)
+        self.assertIsNotNone(token)
+        other = self._replica()
+        self.assertIsNone(other.acquire_lock('movie:tt1', 5))
+        other.release_lock('movie:tt1', 'not-the-token')
+        self.assertTrue(self.cache.is_locked('movie:tt1'))
+        self.cache.release_lock('movie:tt1', token)
+        self.assertFalse(other.is_locked('movie:tt1'))
+
+    def test_other_replicas_hear_about_invalidations(self):
+        other = self._replica()
+        heard = []
+        received = threading.Event()
+        other.subscribe(lambda tags: heard.append(tags) or received.set())
+        # The listener thread subscribes asynchronously
+        for _ in range(200):
+            if other.client.pubsub_numsub(other.channel)[0][1]:
+                break
+            received.wait(0.01)
+        self.cache.invalidate(['tt1', 'tt2'])
+        self.assertTrue(received.wait(2))
+        self.assertEqual(heard, [['tt1', 'tt2']])
+
+    def test_unreachable_server_is_treated_as_a_miss(self):
+        self.server.connected = False
+        self.assertIsNone(self.cache.get('tt1', 'movie'))
+        self.assertFalse(self.cache.set('tt1', 'movie', 'value', 60))
+        self.assertIs(self.cache.acquire_lock('movie:tt1', 5), True)
+        self.assertEqual(self.cache.get_stats()['errors'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
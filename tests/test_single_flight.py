@@ -0,0 +1,77 @@
+import threading
+import time
+import unittest
+
+from app.single_flight import SingleFlight
+
+
+class SingleFlightTest(unittest.TestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = []
+
+    def _run_concurrently(self, key, fn, callers=5):
+        """Call fn through the flight from several threads while the first call is still running."""
+        results, errors = [], []
+
+        def call():
+            try:
+                results.append(self.flight.do(key, fn))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        threads[0].start()
+        self.started.wait(2)
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.1)
+        self.release.set()
+        for thread in threads:
+            thread.join(2)
+        return results, errors
+
+    def _slow(self, value):
+        def fn():
+            self.calls.append(value)
+            self.started.set()
+            self.release.wait(2)
+            return value
+        return fn
+
+    def test_concurrent_callers_share_one_call(self):
+        results, errors = self._run_concurrently('tt1', self._slow(({'title': 'a'}, 'trakt')))
+        self.assertEqual(errors, [])
+        self.assertEqual(self.calls, [({'title': 'a'}, 'trakt')])
+        self.assertEqual(results, [({'title': 'a'}, 'trakt')] * 5)
+
+    def test_callers_get_their_own_containers(self):
+        results, _ = self._run_concurrently('tt1', self._slow(({'title': 'a'}, 'trakt')), callers=2)
+        results[0][0]['seasons'] = {}
+        self.assertNotIn('seasons', results[1][0])
+
+    def test_error_reaches_every_waiter(self):
+        def fail():
+            self.calls.append('fail')
+            self.started.set()
+            self.release.wait(2)
+            raise ValueError('Trakt is down')
+
+        results, errors = self._run_concurrently('tt1', fail, callers=3)
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), 3)
+        self.assertTrue(all(isinstance(error, ValueError) for error in errors))
+        self.assertEqual(self.calls, ['fail'])
+
+    def test_later_calls_run_again(self):
+        self.release.set()
+        self.flight.do('tt1', self._slow(1))
+        self.flight.do('tt1', self._slow(2))
+        self.assertEqual(self.calls, [1, 2])
+        self.assertEqual(self.flight._calls, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+from app.trakt_scheduler import TraktScheduler, INTERACTIVE, BACKGROUND
+
+
+def _response(status_code=200, **headers):
+    return SimpleNamespace(status_code=status_code, headers=headers)
+
+
+class TraktSchedulerTest(unittest.TestCase):
+    def test_requests_within_the_bucket_do_not_wait(self):
+        scheduler = TraktScheduler(limit=5, period=60)
+        waits = [scheduler.acquire() for _ in range(5)]
+        self.assertLess(max(waits), 0.05)
+        self.assertEqual(scheduler.get_metrics()['lanes'][INTERACTIVE]['requests'], 5)
+
+    def test_empty_bucket_waits_for_a_refill(self):
+        scheduler = TraktScheduler(limit=1, period=0.2)
+        scheduler.acquire()
+        self.assertGreaterEqual(scheduler.acquire(), 0.15)
+
+    def test_rate_limit_headers_reseed_the_bucket(self):
+        scheduler = TraktScheduler(limit=1000, period=300)
+        scheduler.observe(_response(**{'X-Ratelimit': '{"limit": 10, "period": 5, "remaining": 2}'}))
+        metrics = scheduler.get_metrics()
+        self.assertEqual(metrics['capacity'], 10)
+        self.assertEqual(metrics['rate_per_second'], 2)
+        self.assertLess(metrics['tokens'], 3)
+
+    def test_429_pauses_every_request(self):
+        scheduler = TraktScheduler(limit=1000, period=300)
+        scheduler.observe(_response(429, **{'Retry-After': '0.2'}))
+        self.assertEqual(scheduler.get_metrics()['throttled_responses'], 1)
+        self.assertGreaterEqual(scheduler.acquire(), 0.15)
+
+    def test_bad_headers_are_ignored(self):
+        scheduler = TraktScheduler(limit=1000, period=300)
+        scheduler.observe(_response(**{'X-Ratelimit': 'garbage'}))
+        self.assertEqual(scheduler.get_metrics()['capacity'], 1000)
+        self.assertEqual(TraktScheduler._parse_retry_after('soon'), 10)
+
+    def test_interactive_requests_go_first(self):
+        scheduler = TraktScheduler(limit=1, period=0.3)
+        scheduler.acquire()
+        order = []
+
+        def take(lane):
+            scheduler.acquire(lane)
+            order.append(lane)
+
+        background = threading.Thread(target=take, args=(BACKGROUND,))
+        background.start()
+        time.sleep(0.05)
+        interactive = threading.Thread(target=take, args=(INTERACTIVE,))
+        interactive.start()
+        background.join(2)
+        interactive.join(2)
+        self.assertEqual(order, [INTERACTIVE, BACKGROUND])
+
+    def test_lane_is_per_thread(self):
+        scheduler = TraktScheduler()
+        seen = []
+        with scheduler.lane(BACKGROUND):
+            thread = threading.Thread(target=lambda: seen.append(scheduler.current_lane()))
+            thread.start()
+            thread.join()
+            self.assertEqual(scheduler.current_lane(), BACKGROUND)
+        self.assertEqual(scheduler.current_lane(), INTERACTIVE)
+        self.assertEqual(seen, [INTERACTIVE])
+
+
+if __name__ == '__main__':
+    unittest.main()
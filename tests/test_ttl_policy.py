@@ -0,0 +1,71 @@
+import unittest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from app.settings import Settings
+from app.ttl_policy import TTLPolicy
+
+NOW = datetime(2024, 6, 1)
+
+
+def _item(hit_count=0, trakt_updated_at=None, ttl_seconds=None):
+    return SimpleNamespace(hit_count=hit_count, trakt_updated_at=trakt_updated_at, ttl_seconds=ttl_seconds)
+
+
+def _date(days):
+    return (NOW + timedelta(days=days)).isoformat() + 'Z'
+
+
+class TTLPolicyTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.multiple(Settings(), staleness_threshold=7, adaptive_ttl=True,
+                                      ttl_min=6 * 3600, ttl_max=30 * 86400)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_plain_release_keeps_the_threshold(self):
+        data = {'status': 'released', 'released': _date(-365)}
+        self.assertEqual(TTLPolicy.ttl_for(_item(), data, NOW), timedelta(days=7))
+
+    def test_long_ended_show_is_kept_longest(self):
+        data = {'status': 'ended', 'first_aired': _date(-20 * 365), 'updated_at': _date(-2 * 365),
+                'seasons': {'1': {'episodes': {'1': {'first_aired': _date(-10 * 365)}}}}}
+        self.assertEqual(TTLPolicy.ttl_for(_item(), data, NOW), timedelta(days=30))
+
+    def test_episode_airing_soon_caps_at_a_day(self):
+        data = {'status': 'returning series', 'first_aired': _date(-365),
+                'seasons': {'2': {'episodes': {'1': {'first_aired': _date(3)}}}}}
+        self.assertEqual(TTLPolicy.ttl_for(_item(), data, NOW), timedelta(days=1))
+
+    def test_release_further_out_is_looked_at_again_halfway(self):
+        with mock.patch.object(Settings(), 'staleness_threshold', 30):
+            data = {'status': 'released', 'released': _date(-365),
+                    'release_dates': {'us': [{'date': _date(20)}]}}
+            self.assertEqual(TTLPolicy.ttl_for(_item(), data, NOW), timedelta(days=10))
+
+    def test_popular_and_recently_changed_items_are_kept_fresher(self):
+        data = {'status': 'released', 'released': _date(-365)}
+        self.assertEqual(TTLPolicy.ttl_for(_item(hit_count=100), data, NOW), timedelta(days=3.5))
+        recent = _item(trakt_updated_at=NOW - timedelta(days=1))
+        self.assertEqual(TTLPolicy.ttl_for(recent, data, NOW), timedelta(days=3.5))
+
+    def test_clamped_to_ttl_min(self):
+        with mock.patch.object(Settings(), 'ttl_min', 2 * 86400):
+            data = {'status': 'upcoming', 'released': _date(1)}
+            self.assertEqual(TTLPolicy.ttl_for(_item(), data, NOW), timedelta(days=2))
+
+    def test_unparseable_dates_are_ignored(self):
+        data = {'status': 'released', 'released': 'soon', 'release_dates': 'not json'}
+        self.assertEqual(TTLPolicy.ttl_for(_item(), data, NOW), timedelta(days=7))
+
+    def test_freshness_window(self):
+        self.assertEqual(TTLPolicy.freshness_window(_item(ttl_seconds=3600)), timedelta(hours=1))
+        self.assertEqual(TTLPolicy.freshness_window(_item()), timedelta(days=7))
+        self.assertEqual(TTLPolicy.freshness_window(None), timedelta(days=7))
+        with mock.patch.object(Settings(), 'adaptive_ttl', False):
+            self.assertEqual(TTLPolicy.freshness_window(_item(ttl_seconds=3600)), timedelta(days=7))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,425 @@
+"""Local stand-in for api.trakt.tv, for benchmarking and load testing the battery offline.
+
+Serves the endpoints TraktMetadata and TraktAuth use from recorded fixtures
+or, for IDs without a fixture, from deterministic synthetic data. Latency,
+429/5xx faults and the X-Ratelimit budget are all configurable, and the
+random source is seeded so runs are reproducible.
+
+    python trakt_emulator.py --port 8765 --latency lognormal:80,0.5 --error-rate 0.01
+    TRAKT_API_URL=http://localhost:8765 python main.py
+
+Fixtures are JSON files laid out like the URL paths, e.g.
+    fixtures/shows/tt0903747.json
+    fixtures/shows/tt0903747/seasons.json
+    fixtures/movies/tt0111161.json
+    fixtures/movies/tt0111161/releases.json
+    fixtures/search/imdb/tt0959621.json
+    fixtures/search/tmdb/278.json
+Run with --record-from https://api.trakt.tv --client-id <id> to fill the
+fixture directory from the real API on every miss.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import requests
+
+IMDB_EPISODE_PATTERN = re.compile(r'^(tt\d+)s(\d+)e(\d+)$')
+
+class LatencyModel:
+    """Parses 'fixed:MS', 'uniform:MIN,MAX', 'normal:MEAN,STDDEV' or 'lognormal:MEDIAN,SIGMA' (ms)."""
+
+    def __init__(self, spec, rng):
+        self.rng = rng
+        kind, _, params = spec.partition(':')
+        self.kind = kind
+        self.params = [float(p) for p in params.split(',')] if params else []
+        if kind not in ('none', 'fixed', 'uniform', 'normal', 'lognormal'):
+            raise ValueError(f"Unknown latency model: {spec}")
+
+    def sample(self):
+        p = self.params
+        if self.kind == 'none':
+            return 0.0
+        if self.kind == 'fixed':
+            ms = p[0]
+        elif self.kind == 'uniform':
+            ms = self.rng.uniform(p[0], p[1])
+        elif self.kind == 'normal':
+            ms = self.rng.gauss(p[0], p[1])
+        else:
+            ms = p[0] * self.rng.lognormvariate(0, p[1])
+        return max(ms, 0.0) / 1000
+
+class RateLimiter:
+    """Fixed-window limiter that reports itself the way Trakt's X-Ratelimit header does."""
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+        self.window_start = time.time()
+        self.used = 0
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            return self._take()
+
+    def _take(self):
+        now = time.time()
+        if now - self.window_start >= self.period:
+            self.window_start = now
+            self.used = 0
+        allowed = self.used < self.limit
+        if allowed:
+            self.used += 1
+        until = datetime.fromtimestamp(self.window_start + self.period, tz=timezone.utc)
+        header = json.dumps({
+            'name': 'EMULATED_API_GET_LIMIT',
+            'period': self.period,
+            'limit': self.limit,
+            'remaining': max(self.limit - self.used, 0),
+            'until': until.strftime('%Y-%m-%dT%H:%M:%SZ')
+        })
+        retry_after = max(int(self.window_start + self.period - now) + 1, 1)
+        return allowed, header, retry_after
+
+class SyntheticCatalog:
+    """Deterministic fake catalog keyed on the IMDb ID, so every run serves the same data."""
+
+    def __init__(self, episodes_per_season, max_seasons, unknown_rate, movie_rate):
+        self.episodes_per_season = episodes_per_season
+        self.max_seasons = max_seasons
+        self.unknown_rate = unknown_rate
+        self.movie_rate = movie_rate
+
+    @staticmethod
+    def _fraction(key):
+        return int(hashlib.sha1(key.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+
+    def kind(self, imdb_id):
+        if not re.match(r'^tt\d+$', imdb_id) or self._fraction('unknown:' + imdb_id) < self.unknown_rate:
+            return None
+        return 'movie' if self._fraction('type:' + imdb_id) < self.movie_rate else 'show'
+
+    def _ids(self, imdb_id):
+        number = int(imdb_id[2:])
+        return {'trakt': number, 'slug': f'synthetic-{imdb_id}', 'imdb': imdb_id, 'tmdb': number}
+
+    def show(self, imdb_id):
+        year = 1960 + int(self._fraction('year:' + imdb_id) * 65)
+        status = ['returning series', 'ended', 'canceled', 'in production'][int(self._fraction('status:' + imdb_id) * 4)]
+        return {
+            'title': f'Synthetic Show {imdb_id}',
+            'year': year,
+            'ids': self._ids(imdb_id),
+            'overview': f'A synthetic show generated for {imdb_id}.',
+            'first_aired': f'{year}-01-01T00:00:00.000Z',
+            'runtime': 45,
+            'network': 'Emulator',
+            'country': 'us',
+            'status': status,
+            'rating': 7.5,
+            'votes': 1000,
+            'updated_at': '2024-01-01T00:00:00.000Z',
+            'language': 'en',
+            'genres': ['drama'],
+            'aired_episodes': self.season_count(imdb_id) * self.episodes_per_season
+        }
+
+    def season_count(self, imdb_id):
+        return 1 + int(self._fraction('seasons:' + imdb_id) * self.max_seasons)
+
+    def episode(self, imdb_id, season, number):
+        aired = datetime(2000, 1, 1, tzinfo=timezone.utc) + timedelta(days=season * 365 + number * 7)
+        return {
+            'season': season,
+            'number': number,
+            'title': f'Episode {season}x{number}',
+            'ids': {'trakt': season * 1000 + number, 'imdb': f'{imdb_id}s{season}e{number}', 'tmdb': None},
+            'overview': f'Synthetic episode {number} of season {season}.',
+            'runtime': 45,
+            'first_aired': aired.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+        }
+
+    def seasons(self, imdb_id):
+        return [
+            {
+                'number': season,
+                'ids': {'trakt': season},
+                'episode_count': self.episodes_per_season,
+                'aired_episodes': self.episodes_per_season,
+                'episodes': [self.episode(imdb_id, season, number) for number in range(1, self.episodes_per_season + 1)]
+            }
+            for season in range(0, self.season_count(imdb_id) + 1)
+        ]
+
+    def movie(self, imdb_id):
+        year = 1930 + int(self._fraction('year:' + imdb_id) * 97)
+        return {
+            'title': f'Synthetic Movie {imdb_id}',
+            'year': year,
+            'ids': self._ids(imdb_id),
+            'tagline': 'Generated by the Trakt emulator.',
+            'overview': f'A synthetic movie generated for {imdb_id}.',
+            'released': f'{year}-06-01',
+            'runtime': 110,
+            'country': 'us',
+            'status': 'released',
+            'rating': 7.0,
+            'votes': 1000,
+            'updated_at': '2024-01-01T00:00:00.000Z',
+            'language': 'en',
+            'genres': ['drama']
+        }
+
+    def releases(self, imdb_id):
+        year = self.movie(imdb_id)['year']
+        return [
+            {'country': 'us', 'certification': 'PG-13', 'release_date': f'{year}-06-01', 'release_type': 'theatrical', 'note': None},
+            {'country': 'gb', 'certification': '12A', 'release_date': f'{year}-07-01', 'release_type': 'theatrical', 'note': None},
+            {'country': 'us', 'certification': 'PG-13', 'release_date': f'{year}-12-01', 'release_type': 'digital', 'note': None}
+        ]
+
+class TraktEmulator:
+    def __init__(self, args):
+        self.rng = random.Random(args.seed)
+        self.rng_lock = threading.Lock()
+        self.latency = LatencyModel(args.latency, self.rng)
+        self.error_rate = args.error_rate
+        self.throttle_rate = args.throttle_rate
+        self.limiter = RateLimiter(args.rate_limit, args.rate_period)
+        self.fixtures = args.fixtures
+        self.record_from = args.record_from.rstrip('/') if args.record_from else None
+        self.client_id = args.client_id
+        self.catalog = SyntheticCatalog(args.episodes_per_season, args.max_seasons, args.unknown_rate, args.movie_rate)
+        self.stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'injected_429': 0, 'rate_limited_429': 0, 'injected_5xx': 0, 'not_found': 0, 'by_endpoint': {}}
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def _count_endpoint(self, endpoint):
+        with self.stats_lock:
+            self.stats['by_endpoint'][endpoint] = self.stats['by_endpoint'].get(endpoint, 0) + 1
+
+    def _fixture_path(self, path):
+        return os.path.join(self.fixtures, path.strip('/') + '.json') if self.fixtures else None
+
+    def _load_fixture(self, path):
+        fixture_path = self._fixture_path(path)
+        if fixture_path and os.path.exists(fixture_path):
+            with open(fixture_path) as f:
+                return json.load(f)
+        return None
+
+    def _record(self, path, query):
+        if not (self.record_from and self.fixtures):
+            return None
+        response = requests.get(
+            f"{self.record_from}{path}", params=query, timeout=30,
+            headers={'Content-Type': 'application/json', 'trakt-api-version': '2', 'trakt-api-key': self.client_id}
+        )
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        fixture_path = self._fixture_path(path)
+        os.makedirs(os.path.dirname(fixture_path), exist_ok=True)
+        with open(fixture_path, 'w') as f:
+            json.dump(data, f)
+        return data
+
+    def resolve(self, path, query):
+        """Return (endpoint name, JSON body or None for 404, extra headers)."""
+        parts = [p for p in path.split('/') if p]
+        endpoint = '/'.join(p if not re.match(r'^(tt\d+\S*|\d+|\d{4}-.*)$', p) else '{id}' for p in parts)
+
+        fixture = self._load_fixture(path)
+        if fixture is None:
+            fixture = self._record(path, query)
+        if fixture is not None:
+            return endpoint, fixture, {}
+
+        if len(parts) >= 2 and parts[1] == 'updates':
+            # Nothing changes in the emulated catalog
+            return endpoint, [], {'X-Pagination-Page-Count': '1'}
+        if parts[:1] == ['shows'] and len(parts) >= 2:
+            if self.catalog.kind(parts[1]) != 'show':
+                return endpoint, None, {}
+            if len(parts) == 2:
+                return endpoint, self.catalog.show(parts[1]), {}
+            if parts[2:] == ['seasons']:
+                return endpoint, self.catalog.seasons(parts[1]), {}
+        if parts[:1] == ['movies'] and len(parts) >= 2:
+            if self.catalog.kind(parts[1]) != 'movie':
+                return endpoint, None, {}
+            if len(parts) == 2:
+                return endpoint, self.catalog.movie(parts[1]), {}
+            if parts[2:] == ['releases']:
+                return endpoint, self.catalog.releases(parts[1]), {}
+        if parts[:2] == ['search', 'imdb'] and len(parts) == 3:
+            match = IMDB_EPISODE_PATTERN.match(parts[2])
+            if match and self.catalog.kind(match.group(1)) == 'show':
+                show_id, season, number = match.group(1), int(match.group(2)), int(match.group(3))
+                return endpoint, [{'type': 'episode', 'score': 1000,
+                                   'episode': self.catalog.episode(show_id, season, number),
+                                   'show': self.catalog.show(show_id)}], {}
+            kind = self.catalog.kind(parts[2])
+            if kind:
+                body = self.catalog.movie(parts[2]) if kind == 'movie' else self.catalog.show(parts[2])
+                return endpoint, [{'type': kind, 'score': 1000, kind: body}], {}
+            return endpoint, [], {}
+        if parts[:2] == ['search', 'tmdb'] and len(parts) == 3 and parts[2].isdigit():
+            imdb_id = f'tt{int(parts[2]):07d}'
+            kind = self.catalog.kind(imdb_id)
+            if kind:
+                body = self.catalog.movie(imdb_id) if kind == 'movie' else self.catalog.show(imdb_id)
+                return endpoint, [{'type': kind, 'score': 1000, kind: body}], {}
+            return endpoint, [], {}
+        return endpoint, None, {}
+
+    def fault(self):
+        """Pick an injected fault for this request: None, 429 or a 5xx status."""
+        with self.rng_lock:
+            roll = self.rng.random()
+            delay = self.latency.sample()
+            status = self.rng.choice((500, 502, 503, 504))
+        if roll < self.throttle_rate:
+            return 429, delay
+        if roll < self.throttle_rate + self.error_rate:
+            return status, delay
+        return None, delay
+
+class EmulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    emulator = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+
+    def do_GET(self):
+        emulator = self.emulator
+        url = urlparse(self.path)
+        if url.path == '/_emulator/stats':
+            with emulator.stats_lock:
+                return self._send(200, emulator.stats)
+
+        emulator._count('requests')
+        fault, delay = emulator.fault()
+        time.sleep(delay)
+
+        allowed, rate_header, retry_after = emulator.limiter.take()
+        headers = {'X-Ratelimit': rate_header}
+        if not allowed:
+            emulator._count('rate_limited_429')
+            return self._send(429, {'error': 'rate limit exceeded'}, dict(headers, **{'Retry-After': str(retry_after)}))
+        if fault == 429:
+            emulator._count('injected_429')
+            return self._send(429, {'error': 'rate limit exceeded'}, dict(headers, **{'Retry-After': '1'}))
+        if fault:
+            emulator._count('injected_5xx')
+            return self._send(fault, {'error': 'injected server error'}, headers)
+
+        endpoint, body, extra_headers = emulator.resolve(url.path, parse_qs(url.query))
+        emulator._count_endpoint(endpoint)
+        if body is None:
+            emulator._count('not_found')
+            return self._send(404, {'error': 'not found'}, headers)
+        headers.update(extra_headers)
+        self._send(200, body, headers)
+
+    def do_POST(self):
+        emulator = self.emulator
+        url = urlparse(self.path)
+        self._read_body()
+        time.sleep(emulator.fault()[1])
+        now = int(time.time())
+        if url.path == '/oauth/token':
+            return self._send(200, {
+                'access_token': f'emulated-access-{now}',
+                'token_type': 'bearer',
+                'expires_in': 7776000,
+                'refresh_token': f'emulated-refresh-{now}',
+                'scope': 'public',
+                'created_at': now
+            })
+        if url.path == '/oauth/device/code':
+            return self._send(200, {
+                'device_code': f'emulated-device-{now}',
+                'user_code': 'EMULATED',
+                'verification_url': 'http://localhost/activate',
+                'expires_in': 600,
+                'interval': 1
+            })
+        if url.path == '/oauth/device/token':
+            return self._send(200, {
+                'access_token': f'emulated-access-{now}',
+                'token_type': 'bearer',
+                'expires_in': 7776000,
+                'refresh_token': f'emulated-refresh-{now}',
+                'scope': 'public',
+                'created_at': now
+            })
+        self._send(404, {'error': 'not found'})
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Local Trakt API emulator for offline benchmarking')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fixtures', help='Directory of recorded JSON fixtures laid out by URL path')
+    parser.add_argument('--record-from', help='Upstream base URL to record missing fixtures from')
+    parser.add_argument('--client-id', default='', help='Trakt client ID used when recording')
+    parser.add_argument('--latency', default='none', help="none | fixed:MS | uniform:MIN,MAX | normal:MEAN,STDDEV | lognormal:MEDIAN,SIGMA")
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of GETs answered with a random 5xx')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of GETs answered with an injected 429')
+    parser.add_argument('--rate-limit', type=int, default=1000, help='Requests allowed per rate limit window')
+    parser.add_argument('--rate-period', type=int, default=300, help='Rate limit window in seconds')
+    parser.add_argument('--episodes-per-season', type=int, default=12, help='Synthetic show size')
+    parser.add_argument('--max-seasons', type=int, default=8, help='Synthetic shows get 1..N seasons')
+    parser.add_argument('--unknown-rate', type=float, default=0.0, help='Fraction of synthetic IDs that 404')
+    parser.add_argument('--movie-rate', type=float, default=0.5, help='Fraction of synthetic IDs that are movies')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    EmulatorHandler.emulator = TraktEmulator(args)
+    server = ThreadingHTTPServer((args.host, args.port), EmulatorHandler)
+    server.daemon_threads = True
+    print(f"Trakt emulator listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()